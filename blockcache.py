@@ -0,0 +1,180 @@
+import struct
+from collections import defaultdict
+
+from components import ComponentException
+from simulatorOps.abstractOp import ExecutionException
+
+
+class BasicBlock:
+    """
+    A basic block is a straight-line run of decoded instructions, starting at
+    address `start`. Only the last instruction of a block may change the
+    control flow (branch, write to PC, mode change, etc.), so every other
+    instruction is always followed by the next one in memory.
+
+    The instructions of a block are already decoded (they are the objects kept
+    in the simulator decoder cache), so the whole block can be executed in one
+    call without fetching nor decoding anything.
+    """
+    __slots__ = ("start", "end", "instrs")
+
+    def __init__(self, start, instrs):
+        self.start = start
+        self.end = start + 4 * len(instrs)
+        self.instrs = tuple(instrs)
+
+    def __len__(self):
+        return len(self.instrs)
+
+    def run(self, simulatorContext, maxCount):
+        """
+        Execute at most `maxCount` instructions of this block, one cycle per instruction.
+        Execution stops early if an instruction raises an execution error (which is
+        then added to the simulator pending errors) or if the block was invalidated
+        while running (self-modifying code).
+        A breakpoint raised by an instruction is propagated to the caller, with
+        `simulatorContext.currentInstr` set to the instruction that raised it.
+
+        Return the number of instructions (and cycles) executed.
+        """
+        regs = simulatorContext.regs
+        newCycle = simulatorContext.history.newCycle
+        pcoffset = simulatorContext.pcoffset
+        cache = simulatorContext.blockCache
+        cache.stale = False
+        count = 0
+        for instr in self.instrs:
+            if count == maxCount or cache.stale:
+                break
+            newCycle()
+            count += 1
+            try:
+                instr.execute(simulatorContext)
+            except ComponentException as err:
+                simulatorContext.currentInstr = instr
+                simulatorContext.errorsPending.append(err.cmp, err.text, simulatorContext.getCurrentLine())
+            except ExecutionException as err:
+                simulatorContext.currentInstr = instr
+                simulatorContext.errorsPending.append('execution', err.text, simulatorContext.getCurrentLine())
+            except Exception:
+                # Breakpoint (or anything unexpected), the caller must know which instruction raised it
+                simulatorContext.currentInstr = instr
+                raise
+
+            if instr.pcmodified:
+                # If PC was modified, we simulate the prefetch by adding 8 immediately to it
+                regs[15] += pcoffset
+            else:
+                regs[15] += 4
+
+            if simulatorContext.errorsPending:
+                break
+        return count
+
+
+class BlockCache:
+    """
+    Translation cache holding the basic blocks already decoded, indexed by their
+    start address.
+
+    Since the code may modify itself, the cache must be told about every memory
+    write (see `invalidate`). All the blocks covering a written address are then
+    dropped, and will be translated again on their next execution. If the block
+    currently running is invalidated, the `stale` attribute is set so that the
+    block stops right after the instruction doing the write.
+    """
+    maxBlockLength = 64
+
+    def __init__(self):
+        self.blocks = {}
+        # Maps each word address to the start addresses of the blocks covering it
+        self.owners = defaultdict(set)
+        self.stale = False
+
+    def __contains__(self, addr):
+        return addr in self.blocks
+
+    def get(self, addr):
+        return self.blocks.get(addr)
+
+    def add(self, block):
+        self.blocks[block.start] = block
+        for addr in range(block.start, block.end, 4):
+            self.owners[addr].add(block.start)
+
+    def invalidate(self, addr, size=4):
+        """
+        Drop all the blocks covering at least one byte in [addr, addr+size).
+        """
+        owners = self.owners
+        for word in range(addr & ~3, addr + size, 4):
+            if word not in owners:
+                continue
+            for start in owners.pop(word):
+                block = self.blocks.pop(start, None)
+                if block is None:
+                    continue
+                for other in range(block.start, block.end, 4):
+                    if other != word and other in owners:
+                        owners[other].discard(start)
+                        if not owners[other]:
+                            del owners[other]
+            # Any block may be the one currently running
+            self.stale = True
+
+    def flush(self):
+        self.blocks = {}
+        self.owners = defaultdict(set)
+        self.stale = True
+
+
+class PredecodedImage:
+    """
+    Decoded instructions of the executable sections (INTVEC and CODE), decoded
+    once when the simulator is built. They are stored in a list indexed by
+    (addr - start) // 4, so fetching an instruction is a simple list lookup.
+
+    A slot holds None if the word at this address is not a valid instruction (or
+    is not in an executable section), in which case the simulator falls back to
+    the regular fetch and decode, which reports the error.
+    Like the translation cache, this object must be told about every memory
+    write (see `invalidate`), and then decodes again the words written.
+    """
+    executableSections = ("INTVEC", "CODE")
+
+    def __init__(self, mem, decodeFunc):
+        self.mem = mem
+        self.decodeFunc = decodeFunc
+        sections = [sec for sec in self.executableSections if sec in mem.startAddr]
+        if len(sections) == 0:
+            self.start = self.end = 0
+        else:
+            self.start = min(mem.startAddr[sec] for sec in sections)
+            self.end = max(mem.endAddr[sec] for sec in sections)
+        self.instrs = [None] * ((self.end - self.start + 3) // 4)
+        for sec in sections:
+            for addr in range(mem.startAddr[sec], mem.endAddr[sec] - 3, 4):
+                self._decode(addr)
+
+    def _decode(self, addr):
+        try:
+            instr = self.decodeFunc(struct.unpack("<I", self.mem.get(addr, mayTriggerBkpt=False))[0])
+        except ExecutionException:
+            # Invalid instruction or memory access (ComponentException is an ExecutionException)
+            instr = None
+        self.instrs[(addr - self.start) // 4] = instr
+
+    def get(self, addr):
+        """
+        Return the decoded instruction at `addr`, or None if there is none.
+        """
+        if addr & 3 or not self.start <= addr < self.end:
+            return None
+        return self.instrs[(addr - self.start) >> 2]
+
+    def invalidate(self, addr, size=4):
+        """
+        Decode again the words covering at least one byte in [addr, addr+size).
+        """
+        for word in range(max(addr & ~3, self.start), min(addr + size, self.end), 4):
+            self._decode(word)
@@ -37,11 +37,14 @@ class BCInterpreter:
         self.errorsPending = None
         self.snippetMode = snippetMode
 
-    def reset(self):
+    def reset(self, restoreState=False):
         """
         Reset the state of the simulator (as an ARM reset exception). Memory content is preserved.
+
+        :param restoreState: if True, the registers and the memory are also brought back to their
+                             initial state (the memory content assembled).
         """
-        self.sim.reset()
+        self.sim.reset(restoreState)
 
     def getBreakpointInstr(self, diff=False):
         """
@@ -86,12 +89,13 @@ class BCInterpreter:
         This is returned as a dictionary with 4 keys: 'r', 'w' 'rw', and 'e' (read, write, read/write and execute)
         Each of these keys is associated to a list containing all the breakpoints of this type
         """
-        return {
-            'r': [k for k,v in self.sim.mem.breakpoints.items() if (v & 6) == 4],
-            'w': [k for k,v in self.sim.mem.breakpoints.items() if (v & 6) == 2],
-            'rw': [k for k,v in self.sim.mem.breakpoints.items() if (v & 6) == 6],
-            'e': [k for k,v in self.sim.mem.breakpoints.items() if bool(v & 1)],
-        }
+        bkpts = {'r': [], 'w': [], 'rw': [], 'e': []}
+        for addr, mode in self.sim.mem.breakpoints.items():
+            if mode & 6:
+                bkpts[{4: 'r', 2: 'w', 6: 'rw'}[mode & 6]].append(addr)
+            if mode & 1:
+                bkpts['e'].append(addr)
+        return bkpts
 
     def setBreakpointMem(self, addr, mode):
         """
@@ -151,7 +155,7 @@ class BCInterpreter:
         """
         # Mode = 'r' | 'w' | 'rw' | '' (passing an empty string removes the breakpoint)
         modeOctal = 4*('r' in mode) + 2*('w' in mode)
-        self.sim.flags.breakpoints[flag.upper()] = modeOctal
+        self.sim.regs.setBreakpointOnFlag(flag.upper(), modeOctal)
 
     def setInterrupt(self, type, clearinterrupt, ncyclesbefore=0, ncyclesperiod=0, begincountat=0):
         """
@@ -172,6 +176,8 @@ class BCInterpreter:
         self.sim.interruptParams['t0'] = begincountat if begincountat >= 0 else self.sim.sysHandle.countCycles
         self.sim.interruptParams['type'] = type.upper()
         self.sim.lastInterruptCycle = -1
+        # The cycles executed again when going back in time must use these parameters
+        self.sim.history.takeSnapshot(pinned=True)
 
 
     @property
@@ -195,14 +201,14 @@ class BCInterpreter:
         return self.sim.sysHandle.breakpointInfo if self.sim.sysHandle.breakpointTrigged else None
 
     def setStepMode(self, stepMode):
-        assert stepMode in ("into", "out", "forward", "run")
+        assert stepMode in ("into", "out", "forward", "run", "reverse")
         self.sim.setStepCondition(stepMode)
         self.sim.history.setCheckpoint()
 
     def executeWithExeption(self, mode=None):
         """
         Loop the simulator in a given mode and raise exception
-        :param stepMode: can be "into" | "forward" | "out" | "run" or None, which means to
+        :param stepMode: can be "into" | "forward" | "out" | "run" | "reverse" or None, which means to
                 keep the current mode, whatever it is
         """
         if mode is not None:
@@ -212,7 +218,7 @@ class BCInterpreter:
     def execute(self, mode=None):
         """
         Loop the simulator in a given mode.
-        :param stepMode: can be "into" | "forward" | "out" | "run" or None, which means to
+        :param stepMode: can be "into" | "forward" | "out" | "run" | "reverse" or None, which means to
                 keep the current mode, whatever it is
         """
         if mode is not None:
@@ -261,6 +267,28 @@ class BCInterpreter:
             # We reach end of the history
             self.errorsPending = MultipleErrors(runErr.__class__(), runErr.args)
 
+    def setHistoryPolicy(self, policy, ncycles=None, maxBytes=None):
+        """
+        Set what is recorded to be able to step back.
+
+        :param policy: "off" (no step back, e.g. for an automated evaluation), "last" (the last ncycles
+                        cycles can be stepped back) or "full" (all the cycles can be stepped back)
+        :param ncycles: number of cycles kept with the "last" policy (default: the current value)
+        :param maxBytes: if not None, maximum amount of memory used to record the cycles
+        """
+        self.sim.history.setRecordingPolicy(policy, ncycles, maxBytes)
+
+    def gotoCycle(self, cycle):
+        """
+        Bring the simulation back to a given cycle, even if it is older than the step back history
+        :param cycle: the cycle to go to (as returned by getCycleCount)
+        """
+        try:
+            self.sim.gotoCycle(cycle)
+        except RuntimeError as runErr:
+            # We reach end of the history
+            self.errorsPending = MultipleErrors(runErr.__class__(), runErr.args)
+
     def getMemory(self, addr, returnHexaStr=True):
         """
         Get the value of an address in memory.
@@ -304,6 +332,8 @@ class BCInterpreter:
         if self.sim.mem._getRelativeAddr(addr, 1) is None:
             return
         self.sim.mem.set(addr, val[0], 1)
+        # The cycles executed again when going back in time must see this change
+        self.sim.history.takeSnapshot(pinned=True)
         # In case we modified the current instruction
         self.sim.fetchAndDecode()
 
@@ -347,6 +377,8 @@ class BCInterpreter:
             val = max(val, self.sim.pcoffset)
         self.sim.regs.setRegister(bank, reg_id, val, False)
         self.sim.regs.reactivateBreakpoints()
+        # The cycles executed again when going back in time must see this change
+        self.sim.history.takeSnapshot(pinned=True)
         # Changing the registers may change some infos in the prediction
         # (for instance, memory cells affected by a memory access)
         self.sim.fetchAndDecode()
@@ -383,6 +415,8 @@ class BCInterpreter:
         :param value: boolean with the value to set
         """
         self.sim.regs.setFlag(flag, value, mayTriggerBkpt=False, logToHistory=False)
+        # The cycles executed again when going back in time must see this change
+        self.sim.history.takeSnapshot(pinned=True)
         # Changing the flags may change the decision to execute or not the next instruction, we update it
         self.sim.fetchAndDecode()
 
@@ -430,6 +464,8 @@ class BCInterpreter:
         :param setCheckpoint: set checkpoint on current instruction in history
         """
         result = []
+        # The flags may not be computed yet
+        self.sim.regs.materializeFlags()
         changes = self.sim.history.getDiffFromCheckpoint()
         if setCheckpoint:
             self.sim.history.setCheckpoint()
@@ -437,18 +473,23 @@ class BCInterpreter:
         registers_changes =  changes.get(self.sim.regs.__class__)
         if registers_changes:
             for reg, value in registers_changes.items():
-                if isinstance(reg[1], int):
-                    if reg[0] == 'User':
-                        result.append(['r{}'.format(reg[1]), '{:08x}'.format(value[1])])
-                    else:
-                        result.append(['{}_r{}'.format(reg[0], reg[1]), '{:08x}'.format(value[1])])
+                if isinstance(reg, int):
+                    # Physical register, we update all the banks using it
+                    for bank, regIdx in self.sim.regs.physAliases[reg]:
+                        if regIdx == 16:
+                            result.extend(tuple({k.lower(): "{}".format(v)
+                                                 for k,v in self._parseFlags(spsr=value[1]).items()}.items()))
+                        elif bank == 'User':
+                            result.append(['r{}'.format(regIdx), '{:08x}'.format(value[1])])
+                        else:
+                            result.append(['{}_r{}'.format(bank, regIdx), '{:08x}'.format(value[1])])
+                elif reg == "lazyFlags":
+                    # Not computed yet, the flags are reported through CPSR once computed
+                    continue
                 elif reg[1] == 'CPSR':
                     result.extend(tuple({k.lower(): "{}".format(v)
                                          for k,v in self._parseFlags(cpsr=value[1]).items()}.items()))
                     result.append(['banking', reg[0]])
-                elif reg[1] == 'SPSR':
-                    result.extend(tuple({k.lower(): "{}".format(v)
-                                         for k,v in self._parseFlags(spsr=value[1]).items()}.items()))
 
         memory_changes = changes.get(self.sim.mem.__class__)
         if memory_changes:
@@ -1,5 +1,6 @@
 import operator
 import struct
+from bisect import bisect_left, bisect_right, insort
 from enum import Enum
 from collections import defaultdict, namedtuple, deque
 from simulatorOps.abstractOp import ExecutionException
@@ -59,21 +60,26 @@ class Component:
     def stepBack(self, state):
         raise NotImplementedError
 
-    def getContext(self):
+    def snapshot(self):
+        # Return a copy of the state of the component (see History.takeSnapshot)
         raise NotImplementedError
 
+    def restoreSnapshot(self, state):
+        # Restore a state returned by `snapshot`, and return the changes made, in the
+        # same format as the ones given to the history
+        raise NotImplementedError
 
-class _Register:
+    def diffSnapshot(self, state):
+        # Return the changes made since a state returned by `snapshot`, in the same
+        # format as the ones given to the history
+        raise NotImplementedError
 
-    def __init__(self, n, val=0, altname=None):
-        self.id = n
-        self.val = val
-        self.altname = altname
-        self.breakpoint = 0
+    def snapshotBytes(self, states):
+        # Return the approximate amount of memory used by a list of states returned by `snapshot`
+        raise NotImplementedError
 
-    @property
-    def name(self):
-        return "R{}".format(self.id) if self.altname is None else self.altname
+    def getContext(self):
+        raise NotImplementedError
 
 
 class Registers(Component):
@@ -87,6 +93,11 @@ class Registers(Component):
     the appropriate register given the current bank. Many registers are aliased
     through different banks (this is done automatically by this class).
 
+    The registers of all the banks are kept in a flat list of physical registers
+    (`physRegs`), and each mode has its own map giving the physical register used
+    for each register index (`bankMaps`). Changing the processor mode only changes
+    the map currently used. The history is also kept by physical register.
+
     The current processor mode (and so the current bank) can be retrieved or
     modified using the `mode` property. This entirely depends on the value of
     CPSR, so if the content of this register is changed, the mode will
@@ -106,6 +117,13 @@ class Registers(Component):
     The IRQ and FIQ flags can be retrieved or set using IRQ and FIQ properties.
     Remember that such flag set (=1) means that interrupts are _disabled_!
 
+    The N, Z, C and V flags written by the data processing instructions are
+    evaluated lazily: these instructions only record their operands (see
+    `setArithmeticFlags` and `setLogicalFlags`), and the flags are actually
+    computed and written into CPSR the next time they are read (condition
+    check, CPSR read, user interface, etc.). If a flag write breakpoint is
+    set, the flags are always computed immediately.
+
     CPSR register can be set or retrieved as a whole (as opposed to retrieve
     only some parts of it using the previously exposed API) using the "CPSR"
     property. Same thing applies to SPSR register, which is automatically tied
@@ -121,65 +139,49 @@ class Registers(Component):
     mode2bits = {'User': 16, 'FIQ': 17, 'IRQ': 18, 'SVC': 19}       # Other modes are not supported
     bits2mode = {v:k for k,v in mode2bits.items()}
 
+    # For each mode, maps each register index to a physical register
+    # The "17th" register (index 16) is the SPSR for this mode, which should never be
+    # directly accessed by the user. In User mode, since there is no SPSR, there is no such index.
+    bankMaps = {'User': tuple(range(16)),
+                'FIQ': tuple(range(8)) + tuple(range(16, 23)) + (15, 27),
+                'IRQ': tuple(range(13)) + (23, 24) + (15, 28),
+                'SVC': tuple(range(13)) + (25, 26) + (15, 29)}
+
     def __init__(self, history):
         super().__init__(history)
         self.history.registerObject(self)
         self.bkptActive = True
 
-        # For each bank we create 17 registers (some of them being shared)
-        # The "17th" register is the SPSR for this mode, which should never be
-        # directly accessed by the user
-        # In User mode, since there is no SPSR, no additional register is created
-        self.banks = {}
-
-        # Create user registers
-        regs = [_Register(i) for i in range(16)]
-        regs[13].altname = "SP"
-        regs[14].altname = "LR"
-        regs[15].altname = "PC"
-        self.banks['User'] = regs
-
-        # Create FIQ registers
-        regsFIQ = regs[:8]          # R0-R7 are shared
-        regsFIQ.extend(_Register(i) for i in range(8, 15))        # R8-R14 are exclusive
-        regsFIQ[13].altname = "SP"
-        regsFIQ[14].altname = "LR"
-        regsFIQ.append(regs[15])    # PC is shared
-        regsFIQ.append(_Register(16))
-        regsFIQ[16].altname = "SPSR"
-        self.banks['FIQ'] = regsFIQ
-
-        # Create IRQ registers
-        regsIRQ = regs[:13]         # R0-R12 are shared
-        regsIRQ.extend(_Register(i) for i in range(13, 15))        # R13-R14 are exclusive
-        regsIRQ[13].altname = "SP"
-        regsIRQ[14].altname = "LR"
-        regsIRQ.append(regs[15])    # PC is shared
-        regsIRQ.append(_Register(16))
-        regsIRQ[16].altname = "SPSR"
-        self.banks['IRQ'] = regsIRQ
-
-        # Create SVC registers (used with software interrupts)
-        regsSVC = regs[:13]  # R0-R12 are shared
-        regsSVC.extend(_Register(i) for i in range(13, 15))  # R13-R14 are exclusive
-        regsSVC[13].altname = "SP"
-        regsSVC[14].altname = "LR"
-        regsSVC.append(regs[15])  # PC is shared
-        regsSVC.append(_Register(16))
-        regsSVC[16].altname = "SPSR"
-        self.banks['SVC'] = regsSVC
+        # Physical registers: R0-R15 (user bank, R0-R7 and PC being shared by every bank,
+        # and R8-R12 by every bank but FIQ), then R8-R14 of FIQ, R13-R14 of IRQ, R13-R14 of SVC,
+        # and finally the SPSR of FIQ, IRQ and SVC
+        self.physRegs = [0] * 30
+        self.physBkpts = [0] * 30
+        # For each physical register, the list of (bank, register index) using it
+        self.physAliases = [[] for physIdx in range(30)]
+        for bank, bankMap in self.bankMaps.items():
+            for idx, physIdx in enumerate(bankMap):
+                self.physAliases[physIdx].append((bank, idx))
 
         # CPSR is always used, so we keep it apart
         # By default, we start in user mode, with no flags
         self.regCPSR = self.mode2bits['User']
         self.currentMode = "User"
+        self.currentMap = self.bankMaps["User"]
+
+        # Operation whose NZCV flags are not computed yet (see `setArithmeticFlags`
+        # and `setLogicalFlags`), or None if the flags in CPSR are up to date
+        self.lazyFlags = None
 
         # Keep the breakpoints on the flags
         self.bkptFlags = {k:0 for k in self.flag2index.keys()}
+        self.bkptFlagsWrite = False
 
     def getContext(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         c = {'CPSR': self.regCPSR}
-        c.update(self.banks)
+        c.update({bank: [self.physRegs[p] for p in bankMap] for bank, bankMap in self.bankMaps.items()})
         return c
 
     @property
@@ -192,12 +194,16 @@ class Registers(Component):
             raise ValueError("Invalid mode '{}'".format(val))
         valCPSR = self.regCPSR & (0xFFFFFFFF - 0x1F)    # Clear mode
         valCPSR = self.regCPSR | self.mode2bits[val]
-        self.history.signalChange(self, {(val, "CPSR"): (self.regCPSR, valCPSR)})
+        if self.history.enabled:
+            self.history.signalChange(self, {(val, "CPSR"): (self.regCPSR, valCPSR)})
         self.regCPSR = valCPSR
         self.currentMode = val
+        self.currentMap = self.bankMaps[val]
 
     @property
     def CPSR(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         return self.regCPSR
 
     @CPSR.setter
@@ -205,22 +211,31 @@ class Registers(Component):
         oldValue, newValue = self.regCPSR, val & 0xFFFFFFFF
         self.regCPSR = val
         self.currentMode = self.bits2mode[self.regCPSR & 0x1F]
-        self.history.signalChange(self, {(self.mode, "CPSR"): (oldValue, newValue)})
+        self.currentMap = self.bankMaps[self.currentMode]
+        change = {(self.mode, "CPSR"): (oldValue, newValue)}
+        if self.lazyFlags is not None:
+            # The pending flags are overwritten, no need to compute them
+            change["lazyFlags"] = (self.lazyFlags, None)
+            self.lazyFlags = None
+        if self.history.enabled:
+            self.history.signalChange(self, change)
 
     @property
     def SPSR(self):
         currentBank = self.currentMode
         if currentBank == "User":
             raise ComponentException("register", "Le registre SPSR n'existe pas en mode 'User'!")
-        return self.banks[currentBank][16].val
+        return self.physRegs[self.currentMap[16]]
 
     @SPSR.setter
     def SPSR(self, val):
         currentBank = self.currentMode
         if currentBank == "User":
             raise ComponentException("register", "Le registre SPSR n'existe pas en mode 'User'!")
-        self.history.signalChange(self, {(self.mode, "SPSR"): (self[16], val)})
-        self.banks[currentBank][16].val = val
+        spsrIdx = self.currentMap[16]
+        if self.history.enabled:
+            self.history.signalChange(self, {spsrIdx: (self.physRegs[spsrIdx], val)})
+        self.physRegs[spsrIdx] = val
 
     @property
     def IRQ(self):
@@ -234,7 +249,8 @@ class Registers(Component):
             self.regCPSR |= 1 << 7
         else:
             self.regCPSR &= 0xFFFFFFFF - (1 << 7)
-        self.history.signalChange(self, {(currentBank, "CPSR"): (oldCPSR, self.regCPSR)})
+        if self.history.enabled:
+            self.history.signalChange(self, {(currentBank, "CPSR"): (oldCPSR, self.regCPSR)})
 
     @property
     def FIQ(self):
@@ -248,10 +264,13 @@ class Registers(Component):
             self.regCPSR |= 1 << 6
         else:
             self.regCPSR &= 0xFFFFFFFF - (1 << 6)
-        self.history.signalChange(self, {(currentBank, "CPSR"): (oldCPSR, self.regCPSR)})
+        if self.history.enabled:
+            self.history.signalChange(self, {(currentBank, "CPSR"): (oldCPSR, self.regCPSR)})
 
     @property
     def N(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         return bool(self.regCPSR & 0x80000000)
 
     @N.setter
@@ -260,6 +279,8 @@ class Registers(Component):
 
     @property
     def Z(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         return bool(self.regCPSR & 0x40000000)
 
     @Z.setter
@@ -268,6 +289,8 @@ class Registers(Component):
 
     @property
     def C(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         return bool(self.regCPSR & 0x20000000)
 
     @C.setter
@@ -276,6 +299,8 @@ class Registers(Component):
 
     @property
     def V(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         return bool(self.regCPSR & 0x10000000)
 
     @V.setter
@@ -284,29 +309,38 @@ class Registers(Component):
 
     @property
     def flags(self):
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         return self.regCPSR & 0xF0000000
 
     def __getitem__(self, idx):
-        currentBank = self.currentMode
-        regHandle = self.banks[currentBank][idx]
+        physIdx = self.currentMap[idx]
         # Register
-        if self.bkptActive and regHandle.breakpoint & 4:
-            raise Breakpoint("register", 4, (currentBank, idx))
-        return regHandle.val
+        if self.bkptActive and self.physBkpts[physIdx] & 4:
+            raise Breakpoint("register", 4, (self.currentMode, idx))
+        return self.physRegs[physIdx]
 
     def getAllRegisters(self):
         # Helper function to get all registers from all banks at once
         # The result is returned as a dictionary of dictionary
-        return {bname: {reg.id: reg.val for reg in bank if reg.id < 16} for bname, bank in self.banks.items()}
+        return {bname: {idx: self.physRegs[p] for idx, p in enumerate(bankMap[:16])} for bname, bankMap in self.bankMaps.items()}
 
     def getRegister(self, bank, reg):
         # Get a register with a specific bank
-        if self.bkptActive and self.banks[bank][reg].breakpoint & 4:
+        physIdx = self.bankMaps[bank][reg]
+        if self.bkptActive and self.physBkpts[physIdx] & 4:
             raise Breakpoint("register", 4, (bank, reg))
-        return self.banks[bank][reg].val
+        return self.physRegs[physIdx]
 
     def __setitem__(self, idx, val):
-        self.setRegister(self.currentMode, idx, val)
+        # Same as setRegister with the current bank, but this is on the hot path
+        physIdx = self.currentMap[idx]
+        if self.bkptActive and self.physBkpts[physIdx] & 2:
+            raise Breakpoint("register", 2, (self.currentMode, idx))
+        val &= 0xFFFFFFFF
+        if self.history.enabled:
+            self.history.signalChange(self, {physIdx: (self.physRegs[physIdx], val)})
+        self.physRegs[physIdx] = val
 
     def setRegister(self, bank, reg, val, logToHistory=True):
         # In some cases, we want to set the register of a specific bank
@@ -314,25 +348,16 @@ class Registers(Component):
         # can be used in this specific case.
         # This may also be used if we don't want the change to be logged
         # in the history of the register (just set logToHistory to False).
-        regHandle = self.banks[bank][reg]
-        if self.bkptActive and regHandle.breakpoint & 2:
+        physIdx = self.bankMaps[bank][reg]
+        if self.bkptActive and self.physBkpts[physIdx] & 2:
             raise Breakpoint("register", 2, (bank, reg))
-        oldValue, newValue = self.banks[bank][reg].val, val & 0xFFFFFFFF
-
-        if logToHistory:
-            if reg < 8 or reg == 15:
-                # Always aliased
-                dchanges = {(b, reg): (oldValue, newValue) for b in self.banks}
-            elif reg >= 13 or bank == "FIQ":
-                # Never aliased
-                dchanges = {(bank, reg): (oldValue, newValue)}
-            else:
-                # Aliased with everyone but FIQ
-                dchanges = {(b, reg): (oldValue, newValue) for b in self.banks if b != "FIQ"}
+        oldValue, newValue = self.physRegs[physIdx], val & 0xFFFFFFFF
 
-            self.history.signalChange(self, dchanges)
+        if logToHistory and self.history.enabled:
+            # The change is logged once for the physical register, whatever the banks aliasing it
+            self.history.signalChange(self, {physIdx: (oldValue, newValue)})
 
-        regHandle.val = newValue
+        self.physRegs[physIdx] = newValue
 
     def setFlag(self, flag, value, mayTriggerBkpt=True, logToHistory=True):
         currentBank = self.currentMode
@@ -345,27 +370,100 @@ class Registers(Component):
         if self.bkptActive and mayTriggerBkpt and bkptFlag & 2:
             raise Breakpoint("flags", 2, flag)
 
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         oldCPSR = self.regCPSR
         if value:   # We set the flag
             self.regCPSR |= 1 << self.flag2index[flag]
         else:       # We clear the flag
             self.regCPSR &= 0xFFFFFFFF - (1 << self.flag2index[flag])
 
-        if logToHistory:
+        if logToHistory and self.history.enabled:
             self.history.signalChange(self, {(currentBank, "CPSR"): (oldCPSR, self.regCPSR)})
 
     def setAllFlags(self, flagsDict, mayTriggerBkpt=True):
+        # The breakpoints are checked before anything is modified, since the
+        # changes made in a cycle interrupted by a breakpoint are not kept in the history
+        if self.bkptActive and mayTriggerBkpt:
+            for flag in flagsDict:
+                if self.bkptFlags[flag] & 2:
+                    raise Breakpoint("flags", 2, flag)
+
+        if self.lazyFlags is not None:
+            self.materializeFlags()
         oldCPSR = self.regCPSR
         for flag, value in flagsDict.items():
-
-            if self.bkptActive and mayTriggerBkpt and self.bkptFlags[flag] & 2:
-                raise Breakpoint("flags", 2, flag)
-
             if value:   # We set the flag
                 self.regCPSR |= 1 << self.flag2index[flag]
             else:       # We clear the flag
                 self.regCPSR &= 0xFFFFFFFF - (1 << self.flag2index[flag])
-        self.history.signalChange(self, {(self.currentMode, "CPSR"): (oldCPSR, self.regCPSR)})
+        if self.history.enabled:
+            self.history.signalChange(self, {(self.currentMode, "CPSR"): (oldCPSR, self.regCPSR)})
+
+    def setArithmeticFlags(self, op1, op2, carryIn):
+        # Flags of the 32 bits addition op1 + op2 + carryIn (op1 and op2 must already be
+        # 32 bits unsigned values). All the flags are modified.
+        if self.bkptActive and self.bkptFlagsWrite:
+            self._setFlagsNow((0, op1, op2, carryIn))
+            return
+        record = (0, op1, op2, carryIn)
+        if self.history.enabled:
+            self.history.signalChange(self, {"lazyFlags": (self.lazyFlags, record)})
+        self.lazyFlags = record
+
+    def setLogicalFlags(self, result, carry=None):
+        # Flags of a logical operation: N and Z depend on the result, C is set to the carry
+        # out of the barrel shifter (or unaffected if `carry` is None), and V is unaffected.
+        previous = self.lazyFlags
+        if previous is not None and previous[0] == 1:
+            # Keep a single level of pending operation: the unaffected flags come
+            # from the operation the previous one was based on
+            if carry is None:
+                carry = previous[2]
+            previous = previous[3]
+        record = (1, result, carry, previous)
+        if self.bkptActive and self.bkptFlagsWrite:
+            self._setFlagsNow(record)
+            return
+        if self.history.enabled:
+            self.history.signalChange(self, {"lazyFlags": (self.lazyFlags, record)})
+        self.lazyFlags = record
+
+    def _evaluateFlags(self, record):
+        # Return the NZCV nibble resulting from a pending operation
+        if record is None:
+            return self.regCPSR >> 28
+        if record[0] == 0:
+            _, op1, op2, carryIn = record
+            usum = op1 + op2 + carryIn
+            res = usum & 0xFFFFFFFF
+            # Signed overflow if both operands have the same sign, and the result another one
+            overflow = ((op1 ^ res) & (op2 ^ res)) >> 31
+            return (res >> 31) << 3 | (res == 0) << 2 | (usum >> 32) << 1 | overflow
+        _, res, carry, previous = record
+        nzcv = self._evaluateFlags(previous)
+        if carry is not None:
+            nzcv = nzcv & 0b1101 | bool(carry) << 1
+        return (res >> 31) << 3 | (res == 0) << 2 | nzcv & 0b0011
+
+    def _setFlagsNow(self, record):
+        # Eager version (used when there are breakpoints on the flags)
+        nzcv = self._evaluateFlags(record)
+        self.setAllFlags({'C': nzcv & 2, 'V': nzcv & 1, 'Z': nzcv & 4, 'N': nzcv & 8})
+
+    def materializeFlags(self):
+        """
+        Compute the flags of the pending operation (if any) and write them in CPSR.
+        """
+        record = self.lazyFlags
+        if record is None:
+            return
+        oldCPSR = self.regCPSR
+        self.regCPSR = oldCPSR & 0x0FFFFFFF | self._evaluateFlags(record) << 28
+        self.lazyFlags = None
+        if self.history.enabled:
+            self.history.signalChange(self, {(self.currentMode, "CPSR"): (oldCPSR, self.regCPSR),
+                                             "lazyFlags": (record, None)})
 
     def deactivateBreakpoints(self):
         # Without removing them, do not trig on breakpoint until `reactivateBreakpoints`
@@ -379,34 +477,89 @@ class Registers(Component):
 
     def toggleBreakpointOnRegister(self, bank, regidx, modeOctal):
         # Toggle the value
-        self.banks[bank][regidx].breakpoint ^= modeOctal
+        self.physBkpts[self.bankMaps[bank][regidx]] ^= modeOctal
 
     def toggleBreakpointOnFlag(self, flag, modeOctal):
         # Toggle the value
         self.bkptFlags[flag] ^= modeOctal
+        self.bkptFlagsWrite = any(mode & 2 for mode in self.bkptFlags.values())
 
     def setBreakpointOnRegister(self, bank, regidx, breakpointType):
-        self.banks[bank][regidx].breakpoint = breakpointType
+        self.physBkpts[self.bankMaps[bank][regidx]] = breakpointType
 
     def setBreakpointOnFlag(self, flag, breakpointType):
         self.bkptFlags[flag] = breakpointType
+        self.bkptFlagsWrite = any(mode & 2 for mode in self.bkptFlags.values())
+
+    def hasBreakpoints(self):
+        # True if at least one breakpoint is set on a register or a flag
+        return any(self.bkptFlags.values()) or any(self.physBkpts)
 
     def stepBack(self, state):
         # TODO what happens if we change mode at the same time we change a register?
+        cpsrKeys = [k for k in state if isinstance(k, tuple)]
+        if len(cpsrKeys) > 1:
+            # CPSR is keyed by (bank, "CPSR"), so several keys may be changed over several cycles:
+            # the first one holds the oldest value. We keep a single key, so that the state
+            # can also be used to report the changes made.
+            restored = state[cpsrKeys[0]][0]
+            for k in cpsrKeys:
+                del state[k]
+            state[(self.bits2mode[restored & 0x1F], "CPSR")] = (restored, self.regCPSR)
         for k, val in state.items():
-            bank, reg = k
-            if reg == "CPSR":
+            if isinstance(k, tuple):
+                # CPSR, keyed by (bank, "CPSR")
                 self.regCPSR = val[0]
                 self.currentMode = self.bits2mode[val[0] & 0x1F]
+                self.currentMap = self.bankMaps[self.currentMode]
+            elif k == "lazyFlags":
+                self.lazyFlags = val[0]
             else:
-                if reg == "SPSR":
-                    reg = 16
-                self.banks[bank][reg].val = val[0]
+                # Physical register
+                self.physRegs[k] = val[0]
+
+    def snapshot(self):
+        return (tuple(self.physRegs), self.regCPSR, self.lazyFlags)
+
+    def restoreSnapshot(self, state):
+        if self.lazyFlags is not None:
+            # So that the changes report the actual flags
+            self.materializeFlags()
+        physRegs, regCPSR, lazyFlags = state
+        changes = {physIdx: (old, new) for physIdx, (old, new) in enumerate(zip(self.physRegs, physRegs)) if old != new}
+        if regCPSR != self.regCPSR:
+            changes[(self.bits2mode[regCPSR & 0x1F], "CPSR")] = (self.regCPSR, regCPSR)
+        if lazyFlags is not None:
+            changes["lazyFlags"] = (None, lazyFlags)
+        self.physRegs[:] = physRegs
+        self.regCPSR = regCPSR
+        self.currentMode = self.bits2mode[regCPSR & 0x1F]
+        self.currentMap = self.bankMaps[self.currentMode]
+        self.lazyFlags = lazyFlags
+        return changes
+
+    def diffSnapshot(self, state):
+        physRegs, regCPSR, lazyFlags = state
+        changes = {physIdx: (old, new) for physIdx, (old, new) in enumerate(zip(physRegs, self.physRegs)) if old != new}
+        # The flags not computed yet are evaluated on both sides
+        if lazyFlags is not None:
+            regCPSR = regCPSR & 0x0FFFFFFF | self._evaluateFlags(lazyFlags) << 28
+        currentCPSR = self.regCPSR & 0x0FFFFFFF | self._evaluateFlags(self.lazyFlags) << 28
+        if regCPSR != currentCPSR:
+            changes[(self.currentMode, "CPSR")] = (regCPSR, currentCPSR)
+        return changes
+
+    def snapshotBytes(self, states):
+        # The values are small integers, shared by all the snapshots
+        return len(states) * (8 * len(self.physRegs) + 64)
 
 
 class Memory(Component):
     packformat = {1: "<B", 2: "<H", 4: "<I"}
     maskformat = {1: 0xFF, 2: 0xFFFF, 4: 0xFFFFFFFF}
+    # The memory is made of pages of 2**pageBits bytes (see `__init__`)
+    pageBits = 8
+    pageMask = (1 << pageBits) - 1
 
     def __init__(self, history, memcontent, initval=0):
         super().__init__(history)
@@ -419,8 +572,24 @@ class Memory(Component):
         self.maxAddr = max(self.endAddr.values())
         assert len(self.startAddr) == len(self.endAddr)
 
-        self.data = {k:bytearray(memcontent[k]) for k in self.startAddr.keys()}
-        self.initdata = self.data.copy()
+        # Sections sorted by start address, so that an address can be resolved with a binary
+        # search (see _getRelativeAddr). Empty sections cannot contain any address.
+        self.sectionsTable = sorted((self.startAddr[sec], self.endAddr[sec], sec) for sec in self.startAddr.keys()
+                                        if self.endAddr[sec] > self.startAddr[sec])
+        self.sectionsStart = [start for start, _, _ in self.sectionsTable]
+
+        # The assembled content is kept as an immutable image, made of pages indexed by
+        # (section, page index in the section). The pages written are copied on their first
+        # write in `pages` (copy-on-write): the image is never modified, and the memory is
+        # brought back to it by dropping the pages written.
+        bits = self.pageBits
+        self.sectionsSize = {sec: len(memcontent[sec]) for sec in self.startAddr.keys()}
+        self.image = {}
+        for sec in self.startAddr.keys():
+            content = bytes(memcontent[sec])
+            for idx in range((len(content) + self.pageMask) >> bits):
+                self.image[(sec, idx)] = content[idx << bits:(idx + 1) << bits]
+        self.pages = {}
         self.bkptActive = True
 
         # Maps address to an integer 'n'. The integer n allows to determine if the breakpoint should be
@@ -428,11 +597,68 @@ class Memory(Component):
         # If n & 4, then it is active for each read operation
         # If n & 2, then it is active for each write operation
         # If n & 1, then it is active for each exec operation (namely, an instruction load)
-        self.breakpoints = defaultdict(int)
+        # Only the addresses having a breakpoint are kept.
+        self.breakpoints = {}
+        # For each breakpoint type, the sorted list of the addresses having this type of breakpoint,
+        # so that a memory access can be checked with a single binary search (see _findBreakpoint)
+        self.breakpointsIndex = {1: [], 2: [], 4: []}
+
+        # Objects keeping decoded instructions (e.g. the translation cache), which must be
+        # told when memory content or execution breakpoints change. Each of them must provide
+        # an `invalidate(addr, size)` method.
+        self.codeObservers = []
+
+        # Pages of the last snapshot (see `snapshot`), and pages written since
+        self.snapshotPages = None
+        self.dirtyPages = set()
+
+    @property
+    def data(self):
+        # Copy of the content of each section, as a dictionary {section: bytearray}
+        return {sec: self._read(sec, 0, size) for sec, size in self.sectionsSize.items()}
 
     def getContext(self):
         return self.data
 
+    def _read(self, sec, offset, size):
+        # Return `size` bytes at `offset` in the section `sec` (they must exist)
+        if size == 0:
+            return bytearray()
+        key = (sec, offset >> self.pageBits)
+        pageOffset = offset & self.pageMask
+        page = self.pages.get(key) or self.image[key]
+        if pageOffset + size <= len(page):
+            return page[pageOffset:pageOffset+size]
+        # The bytes are on several pages
+        res = bytearray(page[pageOffset:])
+        while len(res) < size:
+            key = (sec, key[1] + 1)
+            page = self.pages.get(key) or self.image[key]
+            res += page[:size-len(res)]
+        return res
+
+    def _write(self, sec, offset, valBytes):
+        # Write `valBytes` at `offset` in the section `sec` (the bytes must exist)
+        pos = 0
+        while pos < len(valBytes):
+            key = (sec, (offset + pos) >> self.pageBits)
+            pageOffset = (offset + pos) & self.pageMask
+            page = self.pages.get(key)
+            if page is None:
+                # First write in this page, we copy it from the image
+                page = self.pages[key] = bytearray(self.image[key])
+            count = min(len(valBytes) - pos, len(page) - pageOffset)
+            page[pageOffset:pageOffset+count] = valBytes[pos:pos+count]
+            self.dirtyPages.add(key)
+            pos += count
+
+    def registerCodeObserver(self, obj):
+        self.codeObservers.append(obj)
+
+    def _notifyCodeObservers(self, addr, size):
+        for obs in self.codeObservers:
+            obs.invalidate(addr, size)
+
     def _getRelativeAddr(self, addr, size):
         """
         Determine if *addr* is a valid address, and return a tuple containing the section
@@ -443,9 +669,13 @@ class Memory(Component):
         """
         if addr < 0 or addr > self.maxAddr - (size-1):
             return None
-        for sec in self.startAddr.keys():       # TODO : optimize this loop out
-            if self.startAddr[sec] <= addr < self.endAddr[sec] - (size-1):
-                return sec, addr - self.startAddr[sec]
+        # Find the last section beginning at or before addr
+        idx = bisect_right(self.sectionsStart, addr) - 1
+        if idx < 0:
+            return None
+        start, end, sec = self.sectionsTable[idx]
+        if addr < end - (size-1):
+            return sec, addr - start
         return None
 
     def get(self, addr, size=4, execMode=False, mayTriggerBkpt=True):
@@ -457,45 +687,71 @@ class Memory(Component):
                 desc = "Accès mémoire en lecture fautif a l'adresse {}".format(hex(addr))
             raise ComponentException("memory", desc)
 
-        for offset in range(size):
-            if self.bkptActive and execMode and self.breakpoints[addr+offset] & 1:
-                raise Breakpoint("memory", 1, addr + offset)
-            if self.bkptActive and mayTriggerBkpt and self.breakpoints[addr+offset] & 4:
-                raise Breakpoint("memory", 4, addr + offset)
+        if self.bkptActive and self.breakpoints and (execMode or mayTriggerBkpt):
+            bkpt = self._findBreakpoint(addr, size, (1 if execMode else 0) | (4 if mayTriggerBkpt else 0))
+            if bkpt is not None:
+                raise Breakpoint("memory", bkpt[1], bkpt[0])
 
         sec, offset = resolvedAddr
-        return self.data[sec][offset:offset+size]
+        return self._read(sec, offset, size)
 
     def set(self, addr, val, size=4, mayTriggerBkpt=True):
         resolvedAddr = self._getRelativeAddr(addr, size)
         if resolvedAddr is None:
             raise ComponentException("memory", "Accès invalide pour une écriture de taille {} à l'adresse {}".format(size, hex(addr)))
 
-        for offset in range(size):
-            if self.bkptActive and mayTriggerBkpt and self.breakpoints[addr+offset] & 2:
-                raise Breakpoint("memory", 2, addr + offset)
+        if self.bkptActive and self.breakpoints and mayTriggerBkpt:
+            bkpt = self._findBreakpoint(addr, size, 2)
+            if bkpt is not None:
+                raise Breakpoint("memory", 2, bkpt[0])
 
         sec, offset = resolvedAddr
         val &= self.maskformat[size]
         valBytes = struct.pack(self.packformat[size], val)
 
-        dictChanges = {}
-        for of in range(size):
-            dictChanges[(sec, offset+of)] = (self.data[sec][offset+of], valBytes[of])
-        self.history.signalChange(self, dictChanges)
+        if self.history.enabled:
+            oldBytes = self._read(sec, offset, size)
+            dictChanges = {}
+            for of in range(size):
+                dictChanges[(sec, offset+of)] = (oldBytes[of], valBytes[of])
+            self.history.signalChange(self, dictChanges)
 
-        self.data[sec][offset:offset+size] = valBytes
+        self._write(sec, offset, valBytes)
+        self._notifyCodeObservers(addr, size)
+
+    def _findBreakpoint(self, addr, size, modeOctal):
+        """
+        Look for a breakpoint matching modeOctal in [addr, addr+size).
+        Return None if there is none, else a tuple (address, mode) of the breakpoint found
+        at the lowest address (an execution breakpoint has precedence over a read breakpoint
+        at the same address).
+        """
+        found = None
+        for mode in (1, 4, 2):
+            addrList = self.breakpointsIndex[mode]
+            if mode & modeOctal and addrList:
+                idx = bisect_left(addrList, addr)
+                if idx < len(addrList) and addrList[idx] < addr + size and (found is None or addrList[idx] < found[0]):
+                    found = (addrList[idx], mode)
+        return found
 
     def setBreakpoint(self, addr, modeOctal):
-        self.breakpoints[addr] = modeOctal
+        oldMode = self.breakpoints.get(addr, 0)
+        for mode, addrList in self.breakpointsIndex.items():
+            if oldMode & mode and not modeOctal & mode:
+                addrList.remove(addr)
+            elif modeOctal & mode and not oldMode & mode:
+                insort(addrList, addr)
+        if modeOctal:
+            self.breakpoints[addr] = modeOctal
+        else:
+            self.breakpoints.pop(addr, None)
+        self._notifyCodeObservers(addr, 1)
 
     def toggleBreakpoint(self, addr, modeOctal):
-        if not addr in self.breakpoints:
-            self.setBreakpoint(addr, modeOctal)
-        else:
-            # Toggle the value
-            self.breakpoints[addr] ^= modeOctal
-        return self.breakpoints[addr]
+        # Toggle the value
+        self.setBreakpoint(addr, self.breakpoints.get(addr, 0) ^ modeOctal)
+        return self.breakpoints.get(addr, 0)
 
     def deactivateBreakpoints(self):
         # Without removing them, do not trig on breakpoint until `reactivateBreakpoints`
@@ -507,16 +763,99 @@ class Memory(Component):
         self.bkptActive = True
 
     def removeBreakpoint(self, addr):
-        self.breakpoints[addr] = 0
+        self.setBreakpoint(addr, 0)
+
+    def hasBreakpoint(self, addr, size=4, modeOctal=7):
+        # True if an (active) breakpoint matching modeOctal is set in [addr, addr+size)
+        return self.bkptActive and bool(self.breakpoints) and \
+                self._findBreakpoint(addr, size, modeOctal) is not None
+
+    def hasBreakpoints(self):
+        # True if at least one breakpoint is set in memory
+        return bool(self.breakpoints)
 
     def removeExecuteBreakpoints(self, removeList=()):
         # Remove all execution breakpoints that are in removeList
-        for addr in [a for a,b in self.breakpoints.items() if b & 1 == 1 and a in removeList]:
+        for addr in [a for a in self.breakpointsIndex[1] if a in removeList]:
             self.removeBreakpoint(addr)
 
     def stepBack(self, state):
         for k, val in state.items():
             sec, offset = k
-            self.data[sec][offset] = val[0]
+            self._write(sec, offset, bytes((val[0],)))
+            self._notifyCodeObservers(self.startAddr[sec] + offset, 1)
+
+    def snapshot(self):
+        """
+        Return a copy of the memory content, as a dictionary {(section, page index): bytes}.
+        Only the pages written since the previous snapshot are copied, the other ones are
+        shared with it (or with the image). The image is itself a valid snapshot.
+        """
+        if self.snapshotPages is None:
+            pages = dict(self.image)
+            dirtyPages = self.pages.keys()
+        else:
+            pages = dict(self.snapshotPages)
+            dirtyPages = self.dirtyPages
+        for key in dirtyPages:
+            page = self.pages.get(key)
+            pages[key] = self.image[key] if page is None else bytes(page)
+        self.snapshotPages = pages
+        self.dirtyPages = set()
+        return pages
+
+    def _changedPages(self, state):
+        # Pages of a snapshot (see `snapshot`) whose content changed since,
+        # as tuples (page key, snapshot content, current content)
+        if state is self.snapshotPages:
+            # We only have to look at the pages written since this snapshot
+            keys = list(self.dirtyPages)
+        elif state is self.image:
+            # We only have to look at the pages written since the reset
+            keys = list(self.pages)
+        else:
+            keys = state.keys()
+        for key in keys:
+            page = state[key]
+            current = self.pages.get(key) or self.image[key]
+            if current is not page and current != page:
+                yield key, page, current
+
+    def restoreSnapshot(self, state):
+        changes = {}
+        for key, page, current in list(self._changedPages(state)):
+            sec, start = key[0], key[1] << self.pageBits
+            for of, (old, new) in enumerate(zip(current, page)):
+                if old != new:
+                    changes[(sec, start+of)] = (old, new)
+            if page is self.image[key]:
+                # Back to the content of the image
+                del self.pages[key]
+            else:
+                self.pages[key] = bytearray(page)
+            self._notifyCodeObservers(self.startAddr[sec] + start, len(page))
+        self.snapshotPages = state
+        self.dirtyPages = set()
+        return changes
+
+    def diffSnapshot(self, state):
+        changes = {}
+        for key, page, current in self._changedPages(state):
+            sec, start = key[0], key[1] << self.pageBits
+            for of, (old, new) in enumerate(zip(page, current)):
+                if old != new:
+                    changes[(sec, start+of)] = (old, new)
+        return changes
+
+    def snapshotBytes(self, states):
+        # The pages are counted once, even if they are shared by several snapshots
+        total, seen = 0, set()
+        for pages in states:
+            total += 16 * len(pages)
+            for page in pages.values():
+                if id(page) not in seen:
+                    seen.add(id(page))
+                    total += len(page)
+        return total
 
 
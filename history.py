@@ -1,33 +1,146 @@
-from collections import deque
+from bisect import bisect_right
+from collections import deque, namedtuple
+from itertools import islice
+
+# Full copy of the state of the components at a given cycle (see History.takeSnapshot)
+Snapshot = namedtuple("Snapshot", ["cycle", "pinned", "states"])
 
 class History:
+    """
+    Keep track of the changes made to the components, so that it is possible to
+    step back.
+
+    The changes are kept in a journal, which is a preallocated ring buffer of
+    records. Each record holds the component id, the key of the value changed
+    (a register, a memory address, etc.) and the (old value, new value) pair.
+    The index of the first record of each cycle is kept apart (`cycleStarts`),
+    so a step back only has to replay the records of the last cycle in reverse
+    order. The memory used is bounded by the number of records (`capacity`).
+
+    The changes since the last checkpoint (used to update the user interface)
+    are not maintained while the simulation runs: they are aggregated from the
+    journal when asked (see `getDiffFromCheckpoint`). Only the changes which
+    are no longer in the journal (dropped, stepped back or made while the
+    history was suspended) are aggregated as they are removed from it.
+
+    To go back further than the journal, a snapshot of the components (a copy
+    of their whole state) is taken every `snapshotInterval` cycles, even if the
+    history is suspended. Going back to any cycle is then done by restoring the
+    last snapshot before it, and executing again the cycles up to it (see
+    `Simulator.gotoCycle`). The snapshots share the data not modified between
+    them (e.g. the memory pages not written), and their total size is bounded
+    by `snapshotMaxBytes`: when it is exceeded, the older snapshots are thinned
+    out (see `_thinSnapshots`).
 
-    def __init__(self, historyMaxLength=100):
+    What is recorded depends on the recording policy (see `setRecordingPolicy`).
+    If it is "off", the components do not signal their changes at all (they must
+    check `enabled` first), and the changes since the checkpoint are found by
+    comparing the components with a snapshot taken at the checkpoint.
+    """
+    # Default journal capacity, in records per cycle allowed to be stepped back
+    recordsPerCycle = 64
+    # Approximate amount of memory used by a record of the journal
+    recordBytes = 100
+
+    def __init__(self, historyMaxLength=100, snapshotInterval=1000, snapshotMaxBytes=0x400000,
+                 policy="last", journalMaxBytes=None):
         """
         Initialize the history manager.
         historyMaxLength indicates how many step back we should allow at most
+        snapshotInterval indicates the number of cycles between two snapshots
+        snapshotMaxBytes indicates the maximum amount of memory used by the snapshots
+        policy and journalMaxBytes give the recording policy (see `setRecordingPolicy`)
         """
-        self.maxlen = historyMaxLength
+        self.snapshotInterval = max(snapshotInterval, 1)
+        self.snapshotMaxBytes = snapshotMaxBytes
         self.members = {}
+        # Components, by id, and id of each component class
+        self.components = []
+        self.componentIds = {}
+        self.ckptFolded = []
+        self._setPolicy(policy, historyMaxLength, journalMaxBytes)
         self.clear()
 
+    def _setPolicy(self, policy, historyMaxLength, journalMaxBytes):
+        if policy not in ("off", "last", "full"):
+            raise ValueError("Politique d'enregistrement de l'historique invalide : {}".format(policy))
+        self.policy = policy
+        self.historyMaxLength = historyMaxLength
+        self.journalMaxBytes = journalMaxBytes
+        self.enabled = self.recording = policy != "off"
+        # Number of cycles which can be stepped back (None if there is no limit)
+        self.maxlen = {"off": 0, "last": historyMaxLength, "full": None}[policy]
+        # The journal grows up to maxCapacity records, then the oldest cycles are dropped
+        if policy == "full":
+            self.maxCapacity = float("inf")
+        else:
+            self.maxCapacity = max(historyMaxLength, 1) * self.recordsPerCycle
+        if journalMaxBytes is not None:
+            self.maxCapacity = min(self.maxCapacity, max(journalMaxBytes // self.recordBytes, self.recordsPerCycle))
+        self.capacity = int(min(self.maxCapacity, 1024 * self.recordsPerCycle))
+
     def clear(self):
         """
         Reset the history (but do not unregister the components)
         """
-        self.cyclesCount = 1 
-        self.ckpt = {}
-        self.history = deque(maxlen=self.maxlen)
+        self.cyclesCount = 1
+        self._resetJournal()
+        self.setCheckpoint()
+        # Snapshots, sorted by cycle, and the cycle of the next one to take
+        self.snapshots = []
+        self.snapshotsBytes = 0
+        self.nextSnapshot = self.snapshotInterval if self.enabled else float("inf")
+
+    def _resetJournal(self):
+        self.recComponent = [None] * self.capacity
+        self.recKey = [None] * self.capacity
+        self.recValue = [None] * self.capacity
+        # Records are numbered from the beginning of the journal, the record i
+        # being at the position i % capacity. The valid records are in [tail, head).
+        self.head = 0
+        self.tail = 0
         # We add a first pseudo-cycle in case of a modification before the first cycle
-        self.history.append({k:{} for k in self.members})
-        self.ckpt = {k:{} for k in self.members}
+        self.cycleStarts = deque([0], maxlen=self.maxlen)
 
     def registerObject(self, obj):
         """
         Must be called by a component to register itself before starting
-        the simulation.
+        the simulation. Each component must provide the `stepBack`, `snapshot`,
+        `restoreSnapshot` and `snapshotBytes` methods (see Component).
         """
         self.members[obj.__class__] = obj
+        self.componentIds[obj.__class__] = len(self.components)
+        self.components.append(obj)
+        self.ckptFolded.append({})
+
+    def setRecordingPolicy(self, policy, historyMaxLength=None, journalMaxBytes=None):
+        """
+        Change what is recorded, policy being one of:
+        - "off": nothing is recorded, it is not possible to step back (but the
+          changes since the last checkpoint are still available)
+        - "last": the last `historyMaxLength` cycles can be stepped back
+        - "full": all the cycles can be stepped back
+        If journalMaxBytes is not None, it bounds the memory used to record the
+        cycles (the oldest cycles are dropped to stay under it).
+        The cycles recorded so far are dropped, but not the changes since the checkpoint.
+        """
+        if historyMaxLength is None:
+            historyMaxLength = self.historyMaxLength
+        if self.enabled:
+            self._foldCheckpoint(self.head)
+        else:
+            self._foldSnapshotDiff()
+        self._setPolicy(policy, historyMaxLength, journalMaxBytes)
+        self._resetJournal()
+        self.ckptIndex = 0
+        self.snapshots = []
+        self.snapshotsBytes = 0
+        if self.enabled:
+            # We cannot go back before this point
+            self.takeSnapshot(pinned=True)
+        else:
+            self.nextSnapshot = float("inf")
+            self.ckptSnapshot = [obj.snapshot() for obj in self.components]
 
     def newCycle(self):
         """
@@ -35,7 +148,15 @@ class History:
         (all the changes within one step are aggregated).
         Must be called at the _beginning_ of each step (before any changes).
         """
-        self.history.append({k:{} for k in self.members})
+        if self.cyclesCount >= self.nextSnapshot:
+            self.takeSnapshot()
+        if self.recording:
+            cycleStarts = self.cycleStarts
+            cycleStarts.append(self.head)
+            # The oldest cycle may have been dropped
+            self.tail = cycleStarts[0]
+            if self.tail > self.ckptIndex:
+                self._foldCheckpoint(self.tail)
         self.cyclesCount += 1
 
     def restartCycle(self):
@@ -44,57 +165,309 @@ class History:
         Useful for breakpoints, where we actually want to resume the execution
         at the same instruction it was stopped.
         """
-        self.history.pop()
+        # The changes which do not modify the state seen by the user (like the flags
+        # computed lazily, see Registers) may have been logged in this cycle: by only
+        # removing its start marker, we keep them with the previous cycle
+        self.cycleStarts.pop()
         self.cyclesCount -= 1
+        if len(self.cycleStarts) == 0:
+            self._foldCheckpoint(self.head)
+            self.tail = self.head
 
     def signalChange(self, obj, change):
         """
         Called by a component to signal a change. The name identifier must be
         the same as the one used with `registerObject`.
         """
+        compId = self.componentIds[obj.__class__]
+        if not self.recording:
+            # Only the aggregated changes are kept (see `suspend`)
+            self._mergeChanges(self.ckptFolded[compId], change)
+            return
         for name, val in change.items():
-            previousVal = self.history[-1][obj.__class__].get(name)
-            if previousVal:
-                # If we already set a value for this key in the current cycle,
-                # we want to keep the original old value. In other terms, if
-                # the first change was (oldval, newval) and there is another change
-                # (newval, newnewval), we want to keep (oldval, newnewval) as the
-                # change, so that a step back will revert everything.
-                newVal = (previousVal[0], val[1])
-                self.history[-1][obj.__class__][name] = newVal
-            else:
-                self.history[-1][obj.__class__].update(change)
-            # We always want to update the checkpoint (so that the interface
-            # is always up to date)
-            self.ckpt[obj.__class__].update(change)
+            head = self.head
+            if head - self.tail >= self.capacity:
+                self._makeRoom()
+                head = self.head
+            pos = head % self.capacity
+            self.recComponent[pos] = compId
+            self.recKey[pos] = name
+            self.recValue[pos] = val
+            self.head = head + 1
+
+    def signalReset(self, obj, change):
+        """
+        Called by the simulator to signal the changes made by a reset of the component
+        `obj`, after `clear`. These changes cannot be undone, but are reported with
+        the ones since the checkpoint.
+        """
+        self._mergeChanges(self.ckptFolded[self.componentIds[obj.__class__]], change)
 
-    def stepBack(self):
+    def _makeRoom(self):
+        # The journal is full, we make it bigger if allowed, else we drop the oldest cycles
+        if self.capacity < self.maxCapacity:
+            self._resize(int(min(2 * self.capacity, self.maxCapacity)))
+            return
+        cycleStarts = self.cycleStarts
+        while len(cycleStarts) > 1 and self.head - self.tail >= self.capacity:
+            cycleStarts.popleft()
+            self.tail = cycleStarts[0]
+        if self.tail > self.ckptIndex:
+            self._foldCheckpoint(self.tail)
+        if self.head - self.tail >= self.capacity:
+            # The current cycle alone fills the journal, we make it bigger anyway
+            self._resize(2 * self.capacity)
+
+    def _resize(self, capacity):
+        records = [(self.recComponent[i % self.capacity], self.recKey[i % self.capacity], self.recValue[i % self.capacity])
+                    for i in range(self.tail, self.head)]
+        self.capacity = capacity
+        self.recComponent = [None] * capacity
+        self.recKey = [None] * capacity
+        self.recValue = [None] * capacity
+        for i, (compId, key, val) in enumerate(records, self.tail):
+            pos = i % capacity
+            self.recComponent[pos], self.recKey[pos], self.recValue[pos] = compId, key, val
+
+    def stepBack(self, count=1):
         """
-        Called by the simulator to operate a step back over all components.
-        Each registered object (component) must also have a stepBack method.
+        Called by the simulator to operate a step back of `count` cycles over all
+        components. The changes of these cycles are first merged, so that each
+        component is restored only once (see its stepBack method).
+        Return the changes made, as a dictionary {component class: {key: (value
+        before the step back, value restored)}}. They are also added to the changes
+        since the checkpoint.
         """
-        try:
-            hist = self.history.pop()
-        except IndexError:
+        cycleStarts = self.cycleStarts
+        n = min(count, len(cycleStarts))
+        if n == 0:
             # We reached the end of the history
             raise RuntimeError("Fin de l'historique atteinte, impossible de remonter plus haut!")
+        for c in range(n):
+            start = cycleStarts.pop()
 
-        for name,obj in self.members.items():
-            obj.stepBack(hist[name])
-        
-        self.cyclesCount -= 1
+        # The changes since the checkpoint are still reported, even if we remove them from the journal
+        if start < self.head:
+            self._foldCheckpoint(self.head)
+            self.ckptIndex = start
+
+        # For each key, we keep the oldest value (the one restored) and the newest one
+        states = [{} for obj in self.components]
+        self._aggregateRecords(states, start, self.head)
+        for i in range(start, self.head):
+            # Do not keep references to old values
+            self.recValue[i % self.capacity] = None
+        self.head = start
+
+        for obj, state in zip(self.components, states):
+            obj.stepBack(state)
+        changes = [{name: (val[1], val[0]) for name, val in state.items()} for state in states]
+
+        # If we go back to the beginning, we do not reach the end of the history
+        endReached = n < count and self.cyclesCount > n
+        self.cyclesCount -= n
         if self.cyclesCount == 0:
-            # We ensure that we always have at least one history struct in our deque
+            # We ensure that we always have at least one history struct in our journal
+            ckptFolded = self.ckptFolded
             self.clear()
+            self.ckptFolded = ckptFolded
+            self.takeSnapshot(pinned=True)
+        elif self.snapshots and self.snapshots[-1].cycle > self.cyclesCount:
+            self._dropFutureSnapshots()
+
+        # The restored values are reported to the user interface like any other change
+        for folded, change in zip(self.ckptFolded, changes):
+            self._mergeChanges(folded, change)
+        if endReached:
+            # We reached the end of the history
+            raise RuntimeError("Fin de l'historique atteinte, impossible de remonter plus haut!")
+
+        return {obj.__class__: change for obj, change in zip(self.components, changes)}
+
+    def findCycleBack(self, match):
+        """
+        Scan the journal backwards, looking for the most recent cycle for which
+        `match` returns True. `match` is given the changes of the cycle, as a list
+        with a dictionary {key: (old value, new value)} for each component id.
+        Return the number of cycles to step back to undo this cycle, or None if
+        no cycle matches (the oldest cycle of the journal is not scanned, since
+        it may hold changes made before the first instruction).
+        """
+        end = self.head
+        for depth, start in enumerate(islice(reversed(self.cycleStarts), len(self.cycleStarts) - 1), 1):
+            changes = [{} for obj in self.components]
+            self._aggregateRecords(changes, start, end)
+            if match(changes):
+                return depth
+            end = start
+        return None
+
+    def suspend(self):
+        """
+        Stop recording the changes cycle by cycle. The cycles count and the
+        aggregated changes since the last checkpoint are still updated, but it
+        will not be possible to step back before the call to `resume`.
+        """
+        self.recording = False
+        self.cycleStarts.clear()
+        self._foldCheckpoint(self.head)
+        self.tail = self.head
+
+    def resume(self):
+        """
+        Restart recording the changes (see `suspend`).
+        """
+        if not self.enabled:
+            return
+        self.recording = True
+        # Same as in `clear`, in case of a modification before the next cycle
+        self.cycleStarts.append(self.head)
 
     def setCheckpoint(self):
         """
         Reset the checkpoint so that we aggregate the changes from this point.
         """
-        self.ckpt = {k:{} for k in self.members}
-    
+        # Changes since the checkpoint are the records from ckptIndex, plus the
+        # changes already aggregated in ckptFolded (one dict per component)
+        # The records before ckptIndex are never needed anymore, so ckptIndex >= tail
+        self.ckptIndex = self.head
+        self.ckptFolded = [{} for obj in self.components]
+        if not self.enabled:
+            # The changes are not signaled, we will compare the components with their current state
+            self.ckptSnapshot = [obj.snapshot() for obj in self.components]
+
+    @staticmethod
+    def _mergeChanges(aggregated, change):
+        # Add `change` to the `aggregated` changes, keeping the original old value of each key
+        for name, val in change.items():
+            previousVal = aggregated.get(name)
+            aggregated[name] = (previousVal[0], val[1]) if previousVal else val
+
+    def _aggregateRecords(self, aggregated, start, end):
+        # Aggregate the records in [start, end) in `aggregated` (one dict per component)
+        # If we already have a change for a key, we keep its original old value
+        for i in range(start, end):
+            pos = i % self.capacity
+            changes = aggregated[self.recComponent[pos]]
+            name, val = self.recKey[pos], self.recValue[pos]
+            previousVal = changes.get(name)
+            if previousVal:
+                changes[name] = (previousVal[0], val[1])
+            else:
+                changes[name] = val
+
+    def _foldCheckpoint(self, end):
+        """
+        Aggregate in ckptFolded the records since the checkpoint up to `end` (excluded),
+        before they are removed from the journal.
+        """
+        if end > self.ckptIndex:
+            self._aggregateRecords(self.ckptFolded, self.ckptIndex, end)
+            self.ckptIndex = end
+
+    def _foldSnapshotDiff(self):
+        # Same as `_foldCheckpoint` when the policy is "off"
+        for folded, obj, state in zip(self.ckptFolded, self.components, self.ckptSnapshot):
+            self._mergeChanges(folded, obj.diffSnapshot(state))
+        self.ckptSnapshot = [obj.snapshot() for obj in self.components]
+
     def getDiffFromCheckpoint(self):
         """
-        Return all the aggregated changes since the last checkpoint
+        Return all the aggregated changes since the last checkpoint, as a
+        dictionary {component class: {key: (old value, new value)}}.
+        """
+        diff = [dict(folded) for folded in self.ckptFolded]
+        if self.enabled:
+            self._aggregateRecords(diff, self.ckptIndex, self.head)
+        else:
+            for changes, obj, state in zip(diff, self.components, self.ckptSnapshot):
+                self._mergeChanges(changes, obj.diffSnapshot(state))
+        return {obj.__class__: d for obj, d in zip(self.components, diff)}
+
+    def takeSnapshot(self, pinned=False):
+        """
+        Take a snapshot of the components at the current cycle (the changes made
+        from now on belong to the next cycles). A pinned snapshot is never dropped
+        to make room for the other ones: it must be taken after each modification
+        which is not made by the program (e.g. by the user), since the cycles
+        executed again after restoring an older snapshot would not include it.
+        """
+        if not self.enabled:
+            return
+        if self.snapshots and self.snapshots[-1].cycle == self.cyclesCount:
+            # We replace the snapshot of this cycle
+            pinned = pinned or self.snapshots[-1].pinned
+            self.snapshotsBytes -= self._snapshotsSize(self.snapshots[-2:]) - self._snapshotsSize(self.snapshots[-2:-1])
+            self.snapshots.pop()
+        self.snapshots.append(Snapshot(self.cyclesCount, pinned, [obj.snapshot() for obj in self.components]))
+        self.snapshotsBytes += self._snapshotsSize(self.snapshots[-2:]) - self._snapshotsSize(self.snapshots[-2:-1])
+        self.nextSnapshot = (self.cyclesCount // self.snapshotInterval + 1) * self.snapshotInterval
+        if self.snapshotsBytes > self.snapshotMaxBytes:
+            self._thinSnapshots()
+
+    def _snapshotsSize(self, snapshots):
+        # Size of the given snapshots, the data they share being counted once
+        return sum(obj.snapshotBytes([snap.states[compId] for snap in snapshots])
+                    for compId, obj in enumerate(self.components))
+
+    def _thinSnapshots(self):
+        """
+        Drop snapshots until their total size fits in `snapshotMaxBytes`. The older
+        a snapshot, the sparser the snapshots kept around it: a snapshot taken d
+        intervals ago is kept only if its cycle is a multiple of the largest power
+        of 2 not greater than d (in intervals). If it is not enough, we retry with
+        twice this spacing, and so on. As a last resort, the oldest snapshots are
+        dropped (the pinned ones can only be dropped this way).
+        The last snapshot is always kept.
         """
-        return self.ckpt
\ No newline at end of file
+        interval = self.snapshotInterval
+        maxLevel = (self.cyclesCount // interval).bit_length()
+        level = 0
+        while len(self.snapshots) > 1 and self.snapshotsBytes > self.snapshotMaxBytes:
+            if level <= maxLevel:
+                kept = []
+                for snap in self.snapshots[:-1]:
+                    age = (self.cyclesCount - snap.cycle) // interval
+                    spacing = 1 << (max(age.bit_length() - 1, 0) + level)
+                    if snap.pinned or (snap.cycle // interval) % spacing == 0:
+                        kept.append(snap)
+                kept.append(self.snapshots[-1])
+                self.snapshots = kept
+                level += 1
+            else:
+                del self.snapshots[0]
+            self.snapshotsBytes = self._snapshotsSize(self.snapshots)
+
+    def _dropFutureSnapshots(self):
+        # We went back in time, the snapshots taken after the current cycle are not valid anymore
+        while self.snapshots and self.snapshots[-1].cycle > self.cyclesCount:
+            self.snapshots.pop()
+        self.snapshotsBytes = self._snapshotsSize(self.snapshots)
+        self.nextSnapshot = (self.cyclesCount // self.snapshotInterval + 1) * self.snapshotInterval
+
+    def restoreSnapshot(self, cycle):
+        """
+        Restore the components to the last snapshot taken at or before `cycle`,
+        and return the cycle of this snapshot. The journal is emptied (it is not
+        possible to step back before this cycle anymore, except by restoring an
+        older snapshot). The changes made are reported in the changes since the
+        checkpoint.
+        """
+        idx = bisect_right([snap.cycle for snap in self.snapshots], cycle) - 1
+        if idx < 0:
+            # We reached the end of the history
+            raise RuntimeError("Fin de l'historique atteinte, impossible de remonter plus haut!")
+        snap = self.snapshots[idx]
+        changes = [obj.restoreSnapshot(state) for obj, state in zip(self.components, snap.states)]
+
+        # The records still in the journal are kept in the changes since the checkpoint
+        self._foldCheckpoint(self.head)
+        self.cycleStarts.clear()
+        self.cycleStarts.append(self.head)
+        self.tail = self.head
+        for folded, change in zip(self.ckptFolded, changes):
+            self._mergeChanges(folded, change)
+
+        self.cyclesCount = snap.cycle
+        self._dropFutureSnapshots()
+        return snap.cycle
@@ -353,8 +353,8 @@ def process(ws, msg_in):
             else:
                 lang = interpreters[ws].lang
                 if data[0] == 'stepback':
+                    # The values restored are reported with the other changes (see updateDisplay)
                     interpreters[ws].stepBack()
-                    force_update_all = True
                 elif data[0] == 'stepinto':
                     interpreters[ws].execute('into')
                 elif data[0] == 'stepforward':
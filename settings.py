@@ -8,9 +8,17 @@ _settings = {"PCbehavior": "+8",            # Can be "+0", "+8"
                                             # (that is, changing the mode of the processor). Technically forbidden
                                             # if we strictly follow ARMv4 specs, but it might be handy in some cases.
              "runmaxit": 10000,             # Maximum number of non-stop iterations
+             "historypolicy": "last",       # Can be "off" (no step back), "last" (the last maxhistorylength
+                                            # cycles can be stepped back) or "full" (all the cycles)
              "maxhistorylength": 1000,      # Maximum history depth
+             "maxhistorymem": None,         # Maximum amount of memory used by the history (None for no limit)
+             "snapshotinterval": 1000,      # Number of cycles between two snapshots of the simulator state
+                                            # (used to go back further than the history depth)
+             "maxsnapshotsmem": 0x400000,   # Maximum amount of memory used by these snapshots
              "fillValue": 0xFF,             # Value used to fill non-initialized (but declared) memory
              "maxtotalmem": 0x10000,        # Maximum amount of memory per simulator
+             "predecode": True,             # True or False, whether the executable sections (INTVEC and CODE) are
+                                            # decoded once and for all when the simulator is built
              }
 
 def getSetting(name):
@@ -8,6 +8,7 @@ from collections import defaultdict, namedtuple, deque
 from settings import getSetting
 from components import Registers, Memory, Breakpoint, ComponentException
 from history import History
+from blockcache import BasicBlock, BlockCache, PredecodedImage
 from simulatorOps.utils import checkMask
 from simulatorOps import *
 from simulatorOps.abstractOp import ExecutionException
@@ -73,21 +74,39 @@ class Simulator:
         self.deactivatedBkpts = []
 
         # Initialize history
-        self.history = History()
+        self.history = History(getSetting("maxhistorylength"), getSetting("snapshotinterval"), getSetting("maxsnapshotsmem"),
+                               getSetting("historypolicy"), getSetting("maxhistorymem"))
 
         # Initialize components
         self.mem = Memory(self.history, memorycontent)
         self.regs = Registers(self.history)
         self.pcInitVal = pcInitValue
+        # Initial state of the registers (see reset)
+        self.initialRegs = self.regs.snapshot()
 
         # Initialize decoders
-        self.decoders = {'BranchOp': BranchOp(), 'DataOp': DataOp(), 
-                            'MemOp': MemOp(), 'MultipleMemOp': MultipleMemOp(),
-                            'HalfSignedMemOp': HalfSignedMemOp(), 'SwapOp': SwapOp(),
-                            'PSROp': PSROp(),
-                            'MulOp': MulOp(), 'MulLongOp': MulLongOp(), 
-                            'SoftInterruptOp': SoftInterruptOp(), 'NopOp': NopOp()}
+        # Each distinct bytecode is decoded once in its own instruction object,
+        # which is kept in decoderCache
+        self.decoders = {'BranchOp': BranchOp, 'DataOp': DataOp, 
+                            'MemOp': MemOp, 'MultipleMemOp': MultipleMemOp,
+                            'HalfSignedMemOp': HalfSignedMemOp, 'SwapOp': SwapOp,
+                            'PSROp': PSROp,
+                            'MulOp': MulOp, 'MulLongOp': MulLongOp, 
+                            'SoftInterruptOp': SoftInterruptOp, 'NopOp': NopOp}
         self.decoderCache = {}
+        # Execution counters, by instruction class (see executionStats)
+        self.countExec = defaultdict(int)
+        self.countExecConditionFalse = defaultdict(int)
+
+        # Decode the executable sections once and for all, if requested
+        self.predecoded = None
+        if getSetting("predecode"):
+            self.predecoded = PredecodedImage(self.mem, self.decodeInstr)
+            self.mem.registerCodeObserver(self.predecoded)
+
+        # Initialize the translation cache (basic blocks used in run mode)
+        self.blockCache = BlockCache()
+        self.mem.registerCodeObserver(self.blockCache)
 
         # Initialize assertion structures
         self.assertionCkpts = set(assertionTriggers.keys())
@@ -111,9 +130,21 @@ class Simulator:
         self.runIteration = 0
         self.history.clear()
 
-    def reset(self):
+    def reset(self, restoreState=False):
+        changes = {}
+        if restoreState:
+            # Back to the initial registers and to the assembled memory content, which
+            # only requires to drop the memory pages written since (see Memory)
+            changes[self.regs] = self.regs.restoreSnapshot(self.initialRegs)
+            changes[self.mem] = self.mem.restoreSnapshot(self.mem.image)
+            self.callStack = []
+            self.assertionWhenReturn = set()
         self.history.clear()
-        self.regs.banks['User'][15].val = self.pcInitVal + self.pcoffset
+        for obj, change in changes.items():
+            self.history.signalReset(obj, change)
+        self.regs.physRegs[self.regs.bankMaps['User'][15]] = self.pcInitVal + self.pcoffset
+        # We can always come back to this state
+        self.history.takeSnapshot(pinned=True)
         self.fetchAndDecode()
         self.explainInstruction()
 
@@ -123,7 +154,7 @@ class Simulator:
         return context
 
     def setStepCondition(self, stepMode):
-        assert stepMode in ("into", "out", "forward", "run")
+        assert stepMode in ("into", "out", "forward", "run", "reverse")
         self.stepMode = stepMode
         self.stepCondition = 1
         self.runIteration = self.history.cyclesCount
@@ -144,7 +175,7 @@ class Simulator:
         if self.stepMode == "run":
             return maxCyclesReached
 
-        # We are doing a step into, we always stop
+        # We are doing a step into (or going backwards), we always stop
         return True
 
     def loop(self):
@@ -154,18 +185,125 @@ class Simulator:
         Stopping criterion can be set using `setStepCondition`.
         """
         self.history.setCheckpoint()
-        for decoder in self.decoders.values():
-            decoder.resetExecCounters()
+        if self.stepMode == "reverse":
+            # Nothing is executed, we go back in the history
+            return self.reverseContinue()
+        self.countExec.clear()
+        self.countExecConditionFalse.clear()
         self.nextInstr()                # We always execute at least one instruction
+        if self.stepMode == "run" and not self.isStepDone() and not self.isObserved():
+            # Nothing can stop us before the end of the run, we can go fast
+            self.runTurbo()
         while not self.isStepDone():    # We repeat until the stopping criterion is met
-            self.nextInstr()
+            if self.stepMode == "run":
+                # Nothing has to be checked between two instructions of the same
+                # basic block, so we can execute them all at once
+                self.nextBlock()
+            else:
+                self.nextInstr()
         self.explainInstruction()       # We only have to explain the last instruction executed before we stop
 
     def stepBack(self, count=1):
-        for c in range(count):
-            self.history.stepBack()
+        """
+        Step back `count` cycles, and return the changes made (see `History.stepBack`).
+        """
+        changes = self.history.stepBack(count)
         self.fetchAndDecode(forceExplain=True)
         self.bkptLastFetch = None
+        return changes
+
+    def reverseContinue(self):
+        """
+        Step back to the most recent cycle where a breakpoint would have stopped the
+        execution: an execution (or read) breakpoint on the instruction executed, a write
+        breakpoint on a memory address or a register modified by the cycle. Since only the
+        changes are recorded in the history, the data reads cannot be checked.
+        If no breakpoint matches, we go back to the oldest cycle recorded.
+        """
+        # The breakpoints disabled to resume the execution after a stop are checked too
+        for bp in self.deactivatedBkpts:
+            self._toggleBreakpoint(bp)
+        self.deactivatedBkpts = []
+
+        regsId = self.history.componentIds[Registers]
+        memId = self.history.componentIds[Memory]
+        pcIdx = self.regs.bankMaps['User'][15]
+        physBkpts = self.regs.physBkpts
+        startAddr = self.mem.startAddr
+
+        def match(changes):
+            regsChanges = changes[regsId]
+            # Every cycle writes PC, its old value gives the instruction executed
+            if pcIdx in regsChanges and self.mem.hasBreakpoint(regsChanges[pcIdx][0] - self.pcoffset, modeOctal=5):
+                return True
+            for key in regsChanges:
+                if isinstance(key, int) and physBkpts[key] & 2:
+                    return True
+            for sec, offset in changes[memId]:
+                if self.mem.hasBreakpoint(startAddr[sec] + offset, size=1, modeOctal=2):
+                    return True
+            return False
+
+        depth = None
+        if self.mem.hasBreakpoints() or self.regs.hasBreakpoints():
+            depth = self.history.findCycleBack(match)
+        if depth is None:
+            depth = len(self.history.cycleStarts) - 1
+        if depth > 0:
+            self.stepBack(depth)
+
+    def gotoCycle(self, cycle):
+        """
+        Go back to the state of the simulator at the given cycle. If this cycle is still
+        in the history journal, this is the same as stepping back. Otherwise, we restore
+        the last snapshot taken before it, and execute again the cycles up to it, which
+        takes at most `history.snapshotInterval` cycles (more if the snapshots were thinned).
+        """
+        depth = self.history.cyclesCount - cycle
+        if depth < 0:
+            raise RuntimeError("Impossible d'aller au cycle {}, qui n'a pas encore été exécuté!".format(cycle))
+        if depth < len(self.history.cycleStarts):
+            return self.stepBack(depth)
+
+        self.history.restoreSnapshot(cycle)
+        self.errorsPending.clear()
+        self.fetchAndDecode()
+        self._replay(cycle - self.history.cyclesCount)
+        self.fetchAndDecode(forceExplain=True)
+        self.bkptLastFetch = None
+
+    def _replay(self, count):
+        """
+        Execute again `count` cycles, after a snapshot was restored (see `gotoCycle`).
+        Breakpoints are ignored, as well as the errors (they were already reported
+        when these cycles were first executed).
+        """
+        self.deactivateAllBreakpoints()
+        try:
+            for c in range(count):
+                if self.currentInstr is None:
+                    break
+                self.history.newCycle()
+                keeppc = self.regs[15] - self.pcoffset
+                currentCallStackLen = len(self.callStack)
+                try:
+                    self.currentInstr.execute(self)
+                except ExecutionException:
+                    pass
+                if self.currentInstr.pcmodified:
+                    self.regs[15] += self.pcoffset
+                else:
+                    self.regs[15] += 4
+                self._postExecute(keeppc, currentCallStackLen, self.currentInstr.pcmodified)
+                pc = self.regs[15] - self.pcoffset
+                instr = self.predecoded.get(pc) if self.predecoded else None
+                if instr is not None:
+                    self.currentInstr = instr
+                else:
+                    self._fetchAndDecode()
+        finally:
+            self.reactivateAllBreakpoints()
+            self.errorsPending.clear()
 
     def executionStats(self):
         """
@@ -185,22 +323,37 @@ class Simulator:
         this kind of instruction was executed, the second the number of times if _would_ have been
         executed except for the condition field (e.g. the condition was not met).
         """
-        memExec = self.decoders['MemOp'].execCounters
-        halfMemExec = self.decoders['HalfSignedMemOp'].execCounters
-        swapExec = self.decoders['SwapOp'].execCounters
-        multiplyExec = self.decoders['MulOp'].execCounters
-        multiplyLongExec = self.decoders['MulLongOp'].execCounters
+        def counters(name):
+            return self.countExec[self.decoders[name]], self.countExecConditionFalse[self.decoders[name]]
+
+        memExec = counters('MemOp')
+        halfMemExec = counters('HalfSignedMemOp')
+        swapExec = counters('SwapOp')
+        multiplyExec = counters('MulOp')
+        multiplyLongExec = counters('MulLongOp')
 
-        return {"data": self.decoders['DataOp'].execCounters,
+        return {"data": counters('DataOp'),
                 "mem": (memExec[0] + halfMemExec[0] + swapExec[0], memExec[1] + halfMemExec[1] + swapExec[1]),
-                "multiplemem": self.decoders['MultipleMemOp'].execCounters,
-                "branch": self.decoders['BranchOp'].execCounters,
+                "multiplemem": counters('MultipleMemOp'),
+                "branch": counters('BranchOp'),
                 "multiply": (multiplyExec[0] + multiplyLongExec[0], multiplyExec[1] + multiplyLongExec[1]),
-                "softinterrupt": self.decoders['SoftInterruptOp'].execCounters,
-                "psr": self.decoders['PSROp'].execCounters,
-                "nop": self.decoders['NopOp'].execCounters}
+                "softinterrupt": counters('SoftInterruptOp'),
+                "psr": counters('PSROp'),
+                "nop": counters('NopOp')}
 
     def fetchAndDecode(self, forceExplain=False):
+        pc = self.regs[15] - self.pcoffset
+        instr = self.predecoded.get(pc) if self.predecoded else None
+        # An instruction fetch triggers the execution and read breakpoints
+        if instr is not None and not self.mem.hasBreakpoint(pc, modeOctal=5):
+            # Fast path, the instruction was already decoded
+            self.currentInstr = instr
+        else:
+            self._fetchAndDecode()
+        if forceExplain or self.isStepDone():
+            self.explainInstruction()
+
+    def _fetchAndDecode(self):
         # Check if PC is valid (multiple of 4)
         if (self.regs[15] - self.pcoffset) % 4 != 0:
             self.fetchedInstr = None
@@ -221,8 +374,6 @@ class Simulator:
                 self.fetchedInstr = None
 
         self.bytecodeToInstr()
-        if forceExplain or self.isStepDone():
-            self.explainInstruction()
 
 
     def bytecodeToInstr(self):
@@ -298,55 +449,121 @@ class Simulator:
         # Assumes that the instruction to decode is in self.fetchedInstr
         instrInt = struct.unpack("<I", self.fetchedInstr)[0]
 
-        if instrInt in self.decoderCache:
-            self.currentInstr = self.decoderCache[instrInt][0]
-            self.currentInstr.setBytecode(instrInt)
-            self.currentInstr.restoreState(self.decoderCache[instrInt][1])
+        self.currentInstr = self.decoderCache.get(instrInt)
+        if self.currentInstr is not None:
             return
 
+        try:
+            self.currentInstr = self.decodeInstr(instrInt)
+        except ExecutionException as err:
+            # Invalid instruction
+            self.currentInstr = None
+            self.errorsPending.append('execution', err.text)
+
+    def decodeInstr(self, instrInt):
+        """
+        Return the instruction object decoded from the bytecode `instrInt`. This object is cached,
+        so each distinct bytecode is only decoded once.
+        Raise an ExecutionException if the bytecode is not a valid instruction.
+        """
+        instr = self.decoderCache.get(instrInt)
+        if instr is None:
+            instr = self._selectDecoder(instrInt)()
+            instr.setBytecode(instrInt)
+            instr.decode()
+            # Once decoded, we add the instruction to the cache
+            if len(self.decoderCache) >= 2000:
+                # Fail-safe, we should never get there with programs < 2000 lines, but just in case,
+                # we do not want to bust the RAM with our cache
+                self.decoderCache = {}
+            self.decoderCache[instrInt] = instr
+        return instr
+
+    def _selectDecoder(self, instrInt):
+        """
+        Return the decoder class matching the bytecode `instrInt` (see `bytecodeToInstr` for the decoding scheme).
+        """
         if not (instrInt >> 26 & 3):
             if instrInt >> 4 & 9 == 9 and not (instrInt >> 25 & 1):
                 if instrInt >> 5 & 3:
-                    self.currentInstr = self.decoders['HalfSignedMemOp']
+                    return self.decoders['HalfSignedMemOp']
                 elif instrInt >> 24 & 1:
-                    self.currentInstr = self.decoders['SwapOp']
+                    return self.decoders['SwapOp']
                 elif instrInt >> 23 & 1:
-                    self.currentInstr = self.decoders['MulLongOp']
+                    return self.decoders['MulLongOp']
                 else:
-                    self.currentInstr = self.decoders['MulOp']
+                    return self.decoders['MulOp']
             elif instrInt >> 24 & 1 and not (instrInt >> 20 & 9):
                 if instrInt >> 18 & 9 == 9:
-                    self.currentInstr = self.decoders['BranchOp']
+                    return self.decoders['BranchOp']
                 elif instrInt >> 19 & 1:
-                    self.currentInstr = self.decoders['PSROp']
+                    return self.decoders['PSROp']
                 else:
-                    self.currentInstr = self.decoders['NopOp']
+                    return self.decoders['NopOp']
             else:
-                self.currentInstr = self.decoders['DataOp']
+                return self.decoders['DataOp']
         elif instrInt >> 26 & 1:
             if instrInt >> 27 & 1:
-                self.currentInstr = self.decoders['SoftInterruptOp']
+                return self.decoders['SoftInterruptOp']
             else:   # Could also check for [4], which is an undefined space in the instruction set
-                self.currentInstr = self.decoders['MemOp']
+                return self.decoders['MemOp']
         elif instrInt >> 25 & 1:
-            self.currentInstr = self.decoders['BranchOp']
+            return self.decoders['BranchOp']
         else:
-            self.currentInstr = self.decoders['MultipleMemOp']
+            return self.decoders['MultipleMemOp']
 
-        if self.currentInstr is not None:
-            self.currentInstr.setBytecode(instrInt)
-            try:
-                self.currentInstr.decode()
-                # Once decoded, we add the instruction to the cache
-                self.decoderCache[instrInt] = (self.currentInstr, self.currentInstr.saveState())
-                if len(self.decoderCache) > 2000:
-                    # Fail-safe, we should never get there with programs < 2000 lines, but just in case,
-                    # we do not want to bust the RAM with our cache
-                    self.decoderCache = {}
-            except ExecutionException as err:
-                # Invalid instruction
-                self.currentInstr = None
-                self.errorsPending.append('execution', err.text)
+    def translateBlock(self, addr):
+        """
+        Decode the basic block beginning at `addr` and add it to the translation cache.
+        The block ends with the first instruction which may change the control flow, or
+        right before an instruction which must be executed alone by `nextInstr`
+        (assertion checkpoint, execution breakpoint, invalid instruction).
+        Return the new block, or None if no block can begin at this address.
+        """
+        if addr % 4 != 0 or addr in self.assertionCkpts:
+            return None
+
+        instrs = []
+        currentAddr = addr
+        while len(instrs) < BlockCache.maxBlockLength:
+            if currentAddr != addr:
+                if currentAddr in self.assertionCkpts:
+                    break
+                if self.mem.hasBreakpoint(currentAddr, modeOctal=5):
+                    break
+            instr = self.predecoded.get(currentAddr) if self.predecoded else None
+            if instr is None:
+                try:
+                    instr = self.decodeInstr(struct.unpack("<I", self.mem.get(currentAddr, mayTriggerBkpt=False))[0])
+                except ExecutionException:
+                    # Invalid memory access (ComponentException) or invalid instruction
+                    break
+            if not instr.conditionValid:
+                break
+            instrs.append(instr)
+            if instr.endsBasicBlock:
+                break
+            currentAddr += 4
+
+        if len(instrs) == 0:
+            return None
+        block = BasicBlock(addr, instrs)
+        self.blockCache.add(block)
+        return block
+
+    def _cyclesBeforeInterrupt(self):
+        """
+        Return the number of cycles which can be executed before we have to look for an
+        interrupt (that is, the interrupt may happen at the end of the last of these cycles).
+        """
+        if not self.interruptActive or self.interruptParams['a'] <= 0:
+            return self.maxit
+        # See the interrupt condition in `_postExecute`
+        beginCycle = self.interruptParams['t0'] + self.interruptParams['b']
+        nextCycle = self.history.cyclesCount + 1
+        lowerBound = max(nextCycle, beginCycle)
+        interruptCycle = lowerBound + (beginCycle + 1 - lowerBound) % self.interruptParams['a']
+        return interruptCycle - nextCycle + 1
 
     def explainInstruction(self):
         if not self.currentInstr:
@@ -515,8 +732,118 @@ class Simulator:
         else:
             self.regs[15] += 4       # PC = PC + 4
 
+        self._postExecute(keeppc, currentCallStackLen, self.currentInstr.pcmodified)
+
+        # We fetch and decode the next instruction
+        self.fetchAndDecode(forceExplain)
+
+        if self.errorsPending:
+            raise self.errorsPending
+
+    def isObserved(self):
+        """
+        Return True if something has to be checked while executing the instructions
+        (breakpoints, assertions or interrupts).
+        """
+        return bool(self.assertionCkpts) or self.interruptActive or \
+                self.mem.hasBreakpoints() or self.regs.hasBreakpoints()
+
+    def runTurbo(self):
+        """
+        Execute the program in run mode, block by block, without checking anything
+        between the blocks nor recording the history of each cycle. Only the changes
+        aggregated since the last checkpoint are kept.
+        Must only be used when nothing observes the execution (see `isObserved`).
+        We stop `history.maxlen` cycles before the end of the run, so that the last
+        cycles are executed normally and it is still possible to step back over them
+        (so nothing is done if all the cycles must be recorded).
+        """
+        if self.history.maxlen is None:
+            return
+        remaining = self.maxit - (self.history.cyclesCount - self.runIteration) - self.history.maxlen
+        if remaining <= 0:
+            return
+
+        self.errorsPending.clear()
+        self.history.suspend()
+        try:
+            while remaining > 0:
+                block = self.blockCache.get(self.regs[15] - self.pcoffset) or self.translateBlock(self.regs[15] - self.pcoffset)
+                if block is None:
+                    # Let nextInstr deal with this instruction
+                    break
+                remaining -= block.run(self, remaining)
+                if self.errorsPending:
+                    break
+        finally:
+            self.history.resume()
+
+        # We fetch and decode the next instruction
+        self.fetchAndDecode()
+
+        if self.errorsPending:
+            raise self.errorsPending
+
+    def nextBlock(self):
+        """
+        Execute the basic blocks beginning at the current instruction, translating them
+        if needed. This is equivalent to calling `nextInstr` for each instruction, except
+        that nothing is checked between two instructions of the same block. Blocks are
+        chained until an error, a breakpoint or an assertion checkpoint is reached, or until
+        the maximum number of iterations is reached. An interrupt is always taken at a block
+        boundary, since blocks are cut just before it.
+        Must only be used after the first instruction of a loop (breakpoints must be active).
+        """
+        if self.currentInstr is None or self.bkptLastFetch:
+            # Let nextInstr raise the error or the breakpoint
+            return self.nextInstr()
+
+        self.errorsPending.clear()
+        remaining = self.maxit - (self.history.cyclesCount - self.runIteration)
+        executed = False
+        while remaining > 0:
+            keeppc = self.regs[15] - self.pcoffset
+            if executed and (keeppc % 4 != 0 or keeppc in self.assertionCkpts or self.mem.hasBreakpoint(keeppc, modeOctal=5)):
+                # Let fetchAndDecode deal with this instruction
+                break
+            block = self.blockCache.get(keeppc) or self.translateBlock(keeppc)
+            if block is None:
+                break
+
+            currentCallStackLen = len(self.callStack)
+            try:
+                count = block.run(self, min(remaining, self._cyclesBeforeInterrupt()))
+            except Breakpoint as bp:
+                # We hit a breakpoint on READ/WRITE, we stop right before the instruction
+                # (block.run set currentInstr), see nextInstr
+                self.deactivatedBkpts.append(bp)
+                self._toggleBreakpoint(bp)
+                self.history.restartCycle()
+                raise bp
+            executed = True
+            remaining -= count
+
+            self._postExecute(keeppc + 4*(count-1), currentCallStackLen, block.instrs[count-1].pcmodified)
+            if self.errorsPending:
+                break
+
+        if not executed:
+            return self.nextInstr()
+
+        # We fetch and decode the next instruction
+        self.fetchAndDecode()
+
+        if self.errorsPending:
+            raise self.errorsPending
+
+    def _postExecute(self, keeppc, currentCallStackLen, pcmodified):
+        """
+        Check the assertions and the interrupts after the execution of the instruction
+        at address `keeppc` (PC must already point to the next instruction).
+        `currentCallStackLen` is the length of the call stack before its execution.
+        """
         newpc = self.regs[15] - self.pcoffset
-        if keeppc in self.assertionCkpts and not self.currentInstr.pcmodified:
+        if keeppc in self.assertionCkpts and not pcmodified:
             # We check if we've hit an post-assertion checkpoint
             self.execAssert(self.assertionData[keeppc], 'AFTER')
         elif currentCallStackLen > len(self.callStack):
@@ -553,12 +880,6 @@ class Simulator:
                 self.regs[14] = self.regs[15] - 4                           # Save PC in LR (on the FIQ or IRQ bank)
                 self.regs[15] = self.pcoffset + (0x18 if self.interruptParams['type'] == "IRQ" else 0x1C)      # Set PC to enter the interrupt
 
-        # We fetch and decode the next instruction
-        self.fetchAndDecode(forceExplain)
-
-        if self.errorsPending:
-            raise self.errorsPending
-
     def deactivateAllBreakpoints(self):
         # Without removing them, do not trig on breakpoint until `reactivateAllBreakpoints`
         # is called. Useful to temporary disable breakpoints of Memory and Registers
@@ -17,12 +17,18 @@ class ExecutionException(Exception):
             return self.text
 
 class AbstractOp:
-    saveStateKeys = frozenset()
+    # An instance is created (and decoded) once for each distinct bytecode, and
+    # then reused each time this bytecode is executed. Each children class must
+    # declare the attributes it decodes in its own __slots__.
+    # The execution counters are kept by the simulator (see Simulator.executionStats).
+    __slots__ = ("instrInt", "condition", "conditionValid", "_conditionRow", "_conditionFlags",
+                 "_type", "pcmodified",
+                 "_nextInstrAddr", "_readflags", "_writeflags",
+                 "_readregs", "_writeregs", "_readmem", "_writemem")
 
     def __init__(self):
         self._type = utils.InstrType.undefined
         self.resetAccessStates()
-        self.resetExecCounters()
 
     def resetAccessStates(self):
         self._nextInstrAddr = -1
@@ -34,13 +40,6 @@ class AbstractOp:
         self._writemem = set()
         self.pcmodified = False
 
-    def resetExecCounters(self):
-        self.countExec, self.countExecConditionFalse = 0, 0
-    
-    @property
-    def execCounters(self):
-        return self.countExec, self.countExecConditionFalse
-
     def setBytecode(self, bytecodeAsInteger):
         # It's easier to work with integer objects when it comes to bit manipulation
         self.instrInt = bytecodeAsInteger
@@ -51,8 +50,13 @@ class AbstractOp:
     def _decodeCondition(self):
         # Retrieve the condition field
         # We must handle potential invalid condition code (instrInt >> 28 == 15)
-        self.condition = utils.conditionMappingR.get(self.instrInt >> 28, None)
+        conditionCode = self.instrInt >> 28
+        self.condition = utils.conditionMappingR.get(conditionCode, None)
         self.conditionValid = self.condition is not None
+        # Row of the condition table for this condition (indexed by the NZCV flags),
+        # and flags read to evaluate it
+        self._conditionRow = utils.conditionTable[conditionCode]
+        self._conditionFlags = utils.conditionFlagsTable[conditionCode]
 
     def _explainCondition(self):
         # Since all instructions can be conditional, we can put a generic
@@ -64,39 +68,17 @@ class AbstractOp:
     def _checkCondition(self, flags):
         # Since all instructions can be conditional, we can put a generic
         # implementation of the condition verification (before execution) here
-        cond = self.condition
         if not self.conditionValid:
             raise ExecutionException("L'instruction est invalide (la condition demandée n'existe pas)")
-        self._readflags = utils.conditionFlagsMapping[cond]
-
-        # Fast path for AL condition (execute inconditionally)
-        if cond == "AL":
+        self._readflags = self._conditionFlags
+        # Fast path for AL condition (execute inconditionally, whatever the flags)
+        if self.condition == "AL":
             return True
+        if flags.lazyFlags is not None:
+            flags.materializeFlags()
+        # The condition is evaluated with a single lookup, using the NZCV flags (4 MSB of CPSR)
+        return self._conditionRow[flags.regCPSR >> 28]
 
-        # Check condition
-        # Warning : here we check if the condition is NOT met, hence we use the
-        # INVERSE of the actual condition
-        # See Table 4-2 of ARM7TDMI data sheet as reference of these conditions
-        # They are roughly ordered to match usage (most used condition first)
-        if (cond == "EQ" and not flags.Z or
-            cond == "NE" and flags.Z or
-            cond == "GE" and not flags.V == flags.N or
-            cond == "LT" and flags.V == flags.N or
-            cond == "GT" and (flags.Z or flags.V != flags.N) or
-            cond == "LE" and (not flags.Z and flags.V == flags.N) or
-            cond == "MI" and not flags.N or
-            cond == "PL" and flags.N or
-            cond == "CS" and not flags.C or
-            cond == "CC" and flags.C or
-            cond == "VS" and not flags.V or
-            cond == "VC" and flags.V or
-            cond == "HI" and (not flags.C or flags.Z) or
-            cond == "LS" and (flags.C and not flags.Z)):
-            return False
-        
-        # Else, the condition is true
-        return True
-    
     def explain(self):
         raise NotImplementedError()
     
@@ -123,12 +105,10 @@ class AbstractOp:
     def instructionType(self):
         return self._type
 
-    def saveState(self):
-        # Each children class must define a saveStateKeys attribute
-        d = {k:v for k,v in self.__dict__.items() if k in self.saveStateKeys} 
-        d['__class__'] = self.__class__
-        return d
-
-    def restoreState(self, state):
-        assert state['__class__'] == self.__class__
-        self.__dict__.update(state)
\ No newline at end of file
+    @property
+    def endsBasicBlock(self):
+        # True if this instruction may change the control flow (write PC, change
+        # the processor mode, enter or leave a function, etc.), in which case it
+        # must be the last instruction of a basic block.
+        # By default, we conservatively assume that it does.
+        return True
@@ -7,8 +7,7 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class BranchOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "imm", "link", "offsetImm", "addrReg"))
+    __slots__ = ("imm", "link", "offsetImm", "addrReg")
 
     def __init__(self):
         super().__init__()
@@ -86,9 +85,9 @@ class BranchOp(AbstractOp):
         self.pcmodified = False
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
         if self.link:
             simulatorContext.regs[14] = simulatorContext.regs[15] - simulatorContext.pcoffset + 4
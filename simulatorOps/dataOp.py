@@ -6,12 +6,40 @@ from collections import defaultdict, namedtuple, deque
 import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
+# Operations selected when an instruction is decoded, so that the execution does
+# not have to dispatch on the opcode.
+# The logical operations return the result (N and Z flags are set according to it, C to
+# the carry out of the barrel shifter, and V is unaffected, see ARM Instr. set, 4.5.1)
+logicalOperations = {'AND': operator.and_,
+                     'TST': operator.and_,
+                     'EOR': operator.xor,
+                     'TEQ': operator.xor,
+                     'ORR': operator.or_,
+                     'BIC': lambda op1, op2: op1 & ~op2,     # Bit clear
+                     'MOV': lambda op1, op2: op2,
+                     'MVN': lambda op1, op2: ~op2}
+
+# The arithmetic operations return the operands (as 32 bits unsigned values) of the
+# addition op1 + op2 + carry they are equivalent to. For a subtraction, including the
+# comparison instruction CMP, C is set to 0 if the subtraction produced a borrow (that is,
+# an unsigned underflow), and to 1 otherwise.
+# http://infocenter.arm.com/help/index.jsp?topic=/com.arm.doc.dui0801a/CIADCDHH.html
+arithmeticOperations = {'ADD': lambda op1, op2, c: (op1 & 0xFFFFFFFF, op2 & 0xFFFFFFFF, 0),
+                        'CMN': lambda op1, op2, c: (op1 & 0xFFFFFFFF, op2 & 0xFFFFFFFF, 0),
+                        'SUB': lambda op1, op2, c: (op1 & 0xFFFFFFFF, ~op2 & 0xFFFFFFFF, 1),
+                        'CMP': lambda op1, op2, c: (op1 & 0xFFFFFFFF, ~op2 & 0xFFFFFFFF, 1),
+                        'RSB': lambda op1, op2, c: (~op1 & 0xFFFFFFFF, op2 & 0xFFFFFFFF, 1),
+                        'ADC': lambda op1, op2, c: (op1 & 0xFFFFFFFF, op2 & 0xFFFFFFFF, c),
+                        'SBC': lambda op1, op2, c: (op1 & 0xFFFFFFFF, ~op2 & 0xFFFFFFFF, c),
+                        'RSC': lambda op1, op2, c: (~op1 & 0xFFFFFFFF, op2 & 0xFFFFFFFF, c)}
+
 class DataOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "opcodeNum", "opcode", 
-                                "imm", "modifyFlags", 
-                                "rd", "rn", 
-                                "shiftedVal", "shift", "carryOutImmShift", "op2reg"))
+    __slots__ = ("opcodeNum", "opcode",
+                 "imm", "modifyFlags",
+                 "rd", "rn",
+                 "shiftedVal", "shift", "carryOutImmShift", "op2reg",
+                 "_operation", "_arithmetic", "_usesCarry", "_writeResult",
+                 "_shiftFunc", "_shiftUsesCarry", "_immCarry")
 
     def __init__(self):
         super().__init__()
@@ -60,6 +88,32 @@ class DataOp(AbstractOp):
                                                 immediate=True,
                                                 value=(instrInt >> 7) & 0x1F)
 
+        self._specialize()
+
+    def _specialize(self):
+        # Select the functions used at execution, according to the opcode and the kind of operand 2
+        self._arithmetic = self.opcode in arithmeticOperations
+        if self._arithmetic:
+            self._operation = arithmeticOperations[self.opcode]
+        else:
+            self._operation = logicalOperations[self.opcode]
+        self._usesCarry = self.opcode in ("ADC", "SBC", "RSC")
+        self._writeResult = self.opcode not in ("TST", "TEQ", "CMP", "CMN")
+
+        # Carry out of the barrel shifter (None if the C flag is unaffected)
+        self._immCarry = None
+        self._shiftFunc = None
+        self._shiftUsesCarry = False
+        if self.imm:
+            if self.shift.value != 0:
+                # We change the carry flag only if we did a shift
+                self._immCarry = self.carryOutImmShift
+        elif self.shift.value != 0 or self.shift.type != "LSL":
+            # LSL #0 is no shift at all (and leaves the C flag unaffected)
+            self._shiftFunc = utils.shiftFunctions[self.shift.type]
+            # The current carry is only used by RRX
+            self._shiftUsesCarry = self.shift.value == 0 and self.shift.type == "ROR"
+
     def explain(self, simulatorContext):
         self.resetAccessStates()
         bank = simulatorContext.regs.mode
@@ -177,77 +231,44 @@ class DataOp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        # Writing into PC changes the control flow, and writing into LR is
+        # considered as stepping out of a function (see execute())
+        return self.opcode not in ("TST", "TEQ", "CMP", "CMN") and self.rd in (14, 15)
+
     def execute(self, simulatorContext):
         self.pcmodified = False
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
         
-        workingFlags = {}
-        workingFlags['C'] = 0
-        # "On logical operations, if the S bit is set (and Rd is not R15)
-        # the V flag in the CPSR will be unaffected"
-        # (ARM Reference 4.5.1)
-        workingFlags['V'] = simulatorContext.regs.V
+        regs = simulatorContext.regs
         # Get first operand value
-        op1 = simulatorContext.regs[self.rn]
+        op1 = regs[self.rn]
         # Get second operand value
         if self.imm:
             op2 = self.shiftedVal
-            if self.shift.value != 0:
-                # We change the carry flag only if we did a shift
-                workingFlags['C'] = self.carryOutImmShift
-            else:
-                workingFlags['C'] = simulatorContext.regs.C
+            carry = self._immCarry
         else:
-            op2 = simulatorContext.regs[self.op2reg]
+            op2 = regs[self.op2reg]
             if self.op2reg == simulatorContext.PC and not self.shift.immediate and simulatorContext.PCSpecialBehavior:
                 op2 += 4    # Special case for PC where we use PC+12 instead of PC+8 (see 4.5.5 of ARM Instr. set)
-            carry, op2 = utils.applyShift(op2, self.shift, simulatorContext.regs.C)
-            workingFlags['C'] = bool(carry)
+            carry = None
+            if self._shiftFunc is not None:
+                carry, op2 = self._shiftFunc(op2, self.shift.value, regs.C if self._shiftUsesCarry else False)
 
-        if self.opcode == "MOV":
-            res = op2
-        elif self.opcode in ("ADD", "CMN"):
-            res, workingFlags['C'], workingFlags['V'] = utils.addWithCarry(op1, op2, 0)
-        elif self.opcode in ("SUB", "CMP"):
-            # For a subtraction, including the comparison instruction CMP, C is set to 0
-            # if the subtraction produced a borrow (that is, an unsigned underflow), and to 1 otherwise.
-            # http://infocenter.arm.com/help/index.jsp?topic=/com.arm.doc.dui0801a/CIADCDHH.html
-            res, workingFlags['C'], workingFlags['V'] = utils.addWithCarry(op1, ~op2, 1)
-        elif self.opcode == "MVN":
-            res = ~op2
-        elif self.opcode in ("AND", "TST"):
-            # These instructions do not affect the V flag (ARM Instr. set, 4.5.1)
-            # However, C flag "is set to the carry out from the barrel shifter [if the shift is not LSL #0]" (4.5.1)
-            # this was already done when we called _shiftVal
-            res = op1 & op2
-        elif self.opcode == "ORR":
-            res = op1 | op2
-        elif self.opcode == "BIC":
-            res = op1 & ~op2     # Bit clear?
-        elif self.opcode in ("EOR", "TEQ"):
-            # These instructions do not affect the C and V flags (ARM Instr. set, 4.5.1)
-            res = op1 ^ op2
-        elif self.opcode == "RSB":
-            res, workingFlags['C'], workingFlags['V'] = utils.addWithCarry(~op1, op2, 1)
-        elif self.opcode== "ADC":
-            res, workingFlags['C'], workingFlags['V'] = utils.addWithCarry(op1, op2, int(simulatorContext.regs.C))
-        elif self.opcode == "SBC":
-            res, workingFlags['C'], workingFlags['V'] = utils.addWithCarry(op1, ~op2, int(simulatorContext.regs.C))
-        elif self.opcode == "RSC":
-            res, workingFlags['C'], workingFlags['V'] = utils.addWithCarry(~op1, op2, int(simulatorContext.regs.C))
+        # The flags are not computed here: we only give the operands of the operation
+        # to the registers, which compute the flags when they are read (see Registers)
+        if self._arithmetic:
+            addOperands = self._operation(op1, op2, int(regs.C) if self._usesCarry else 0)
+            res = sum(addOperands) & 0xFFFFFFFF
         else:
-            raise ExecutionException("Mnémonique invalide : {}".format(self.opcode))
-
-        # Get the result back to 32 bits, if applicable (else it's just a no-op)
-        res &= 0xFFFFFFFF           
-
-        workingFlags['Z'] = res == 0
-         # "N flag will be set to the value of bit 31 of the result" (4.5.1)
-        workingFlags['N'] = res & 0x80000000
+            # For the logical operations, `carry` is the carry out of the barrel shifter
+            # (None if there is no shift, the C flag being then unaffected)
+            res = self._operation(op1, op2) & 0xFFFFFFFF
 
         if self.modifyFlags:
             if self.rd == simulatorContext.PC:
@@ -262,10 +283,12 @@ class DataOp(AbstractOp):
                     # The mode in SPSR is invalid
                     raise ExecutionException("SPSR devrait ici être copié dans CPSR, mais le mode contenu dans SPSR est invalide!")
                 simulatorContext.regs.CPSR = simulatorContext.regs.SPSR        # Put back the saved SPSR in CPSR
+            elif self._arithmetic:
+                regs.setArithmeticFlags(*addOperands)
             else:
-                simulatorContext.regs.setAllFlags(workingFlags)
+                regs.setLogicalFlags(res, carry)
 
-        if self.opcode not in ("TST", "TEQ", "CMP", "CMN"):
+        if self._writeResult:
             # We actually write the result
             simulatorContext.regs[self.rd] = res
             if self.rd == simulatorContext.PC:
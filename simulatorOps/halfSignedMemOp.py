@@ -7,9 +7,9 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class HalfSignedMemOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "imm", "pre", "sign", "byte", "writeback", "mode", "signed",
-                                "basereg", "rd", "offsetImm", "offsetReg"))
+    __slots__ = ("imm", "pre", "sign", "byte", "writeback", "mode", "signed",
+                 "basereg", "rd", "offsetImm", "offsetReg",
+                 "_load", "_size", "_unpackFormat", "_signBit", "_signExtension")
 
     def __init__(self):
         super().__init__()
@@ -46,6 +46,14 @@ class HalfSignedMemOp(AbstractOp):
             # No shift allowed with these instructions
             self.offsetReg = instrInt & 0xF
 
+        # Select what is used at execution, so that it does not have to check the mode
+        self._load = self.mode == "LDR"
+        self._size = 1 if self.byte else 2
+        self._unpackFormat = "<B" if self.byte else "<H"
+        # For a signed load, the bits set if the sign bit of the value read is set
+        self._signBit = 7 if self.byte else 15
+        self._signExtension = (0xFFFFFF00 if self.byte else 0xFFFF0000) if self.signed else 0
+
 
     def explain(self, simulatorContext):
         self.resetAccessStates()
@@ -157,39 +165,43 @@ class HalfSignedMemOp(AbstractOp):
         return disassembly, description
     
 
+    @property
+    def endsBasicBlock(self):
+        return (self.mode == "LDR" and self.rd == 15) or (self.writeback and self.basereg == 15)
+
     def execute(self, simulatorContext):
+        self.pcmodified = False
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
-        addr = baseval = simulatorContext.regs[self.basereg]
+        regs = simulatorContext.regs
+        addr = baseval = regs[self.basereg]
         if self.imm:
             addr += self.sign * self.offsetImm
         else:
-            addr += self.sign * simulatorContext.regs[self.offsetReg]
+            addr += self.sign * regs[self.offsetReg]
 
         realAddr = addr if self.pre else baseval
-        s = 1 if self.byte else 2
-        if self.mode == 'LDR':
-            m = simulatorContext.mem.get(realAddr, size=s)
+        if self._load:
+            m = simulatorContext.mem.get(realAddr, size=self._size)
             if m is None:       # No such address in the mapped memory, we cannot continue
-                raise ExecutionException("Tentative de lecture de {} octets à partir de l'adresse {} invalide : mémoire non initialisée".format(s, realAddr))
-            res = struct.unpack("<B" if self.byte else "<H", m)[0]
+                raise ExecutionException("Tentative de lecture de {} octets à partir de l'adresse {} invalide : mémoire non initialisée".format(self._size, realAddr))
+            res = struct.unpack(self._unpackFormat, m)[0]
+            # Sign extension (no-op if the load is not signed)
+            res |= self._signExtension * ((res >> self._signBit) & 1)
 
-            simulatorContext.regs[self.rd] = res
-            if self.signed:
-                simulatorContext.regs[self.rd] |= 0xFFFFFF00 * ((res >> 7) & 1) if self.byte else 0xFFFF0000 * ((res >> 15) & 1)
-                
+            regs[self.rd] = res
             if self.rd == simulatorContext.PC:
                 self.pcmodified = True
         else:       # STR
-            valWrite = simulatorContext.regs[self.rd]
+            valWrite = regs[self.rd]
             if self.rd == simulatorContext.PC and simulatorContext.PCSpecialBehavior:
                 valWrite += 4       # Special case for PC (see ARM datasheet, 4.9.4)
             valWrite &= 0xFFFF
-            simulatorContext.mem.set(realAddr, valWrite, size=1 if self.byte else 2)
+            simulatorContext.mem.set(realAddr, valWrite, size=self._size)
 
         if self.writeback:
             simulatorContext.regs[self.basereg] = addr
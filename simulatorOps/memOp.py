@@ -7,9 +7,9 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class MemOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "imm", "pre", "sign", "byte", "writeback", "mode", "nonprivileged",
-                                "basereg", "rd", "offsetImm", "offsetReg", "offsetRegShift"))
+    __slots__ = ("imm", "pre", "sign", "byte", "writeback", "mode", "nonprivileged",
+                 "basereg", "rd", "offsetImm", "offsetReg", "offsetRegShift",
+                 "_load", "_size", "_unpackFormat", "_shiftFunc", "_shiftUsesCarry")
 
     def __init__(self):
         super().__init__()
@@ -46,6 +46,18 @@ class MemOp(AbstractOp):
                                                     immediate=True,
                                                     value=(instrInt >> 7) & 0x1F)
 
+        # Select what is used at execution, so that it does not have to check the mode
+        self._load = self.mode == "LDR"
+        self._size = 1 if self.byte else 4
+        self._unpackFormat = "<B" if self.byte else "<I"
+        self._shiftFunc = None
+        self._shiftUsesCarry = False
+        if not self.imm and (self.offsetRegShift.value != 0 or self.offsetRegShift.type != "LSL"):
+            # LSL #0 is no shift at all
+            self._shiftFunc = utils.shiftFunctions[self.offsetRegShift.type]
+            # The current carry is only used by RRX
+            self._shiftUsesCarry = self.offsetRegShift.value == 0 and self.offsetRegShift.type == "ROR"
+
 
     def explain(self, simulatorContext):
         self.resetAccessStates()
@@ -155,37 +167,43 @@ class MemOp(AbstractOp):
         return disassembly, description
     
 
+    @property
+    def endsBasicBlock(self):
+        return (self.mode == "LDR" and self.rd == 15) or (self.writeback and self.basereg == 15)
+
     def execute(self, simulatorContext):
         self.pcmodified = False
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
-        addr = baseval = simulatorContext.regs[self.basereg]
+        regs = simulatorContext.regs
+        addr = baseval = regs[self.basereg]
         if self.imm:
             addr += self.sign * self.offsetImm
         else:
-            _, sval = utils.applyShift(simulatorContext.regs[self.offsetReg], self.offsetRegShift, simulatorContext.regs.C)
+            sval = regs[self.offsetReg]
+            if self._shiftFunc is not None:
+                _, sval = self._shiftFunc(sval, self.offsetRegShift.value, regs.C if self._shiftUsesCarry else False)
             addr += self.sign * sval
 
         realAddr = addr if self.pre else baseval
-        s = 1 if self.byte else 4
-        if self.mode == 'LDR':
-            m = simulatorContext.mem.get(realAddr, size=s)
+        if self._load:
+            m = simulatorContext.mem.get(realAddr, size=self._size)
             if m is None:       # No such address in the mapped memory, we cannot continue
-                raise ExecutionException("Tentative de lecture de {} octets à partir de l'adresse {} invalide : mémoire non initialisée".format(s, realAddr))
-            res = struct.unpack("<B" if self.byte else "<I", m)[0]
+                raise ExecutionException("Tentative de lecture de {} octets à partir de l'adresse {} invalide : mémoire non initialisée".format(self._size, realAddr))
+            res = struct.unpack(self._unpackFormat, m)[0]
 
-            simulatorContext.regs[self.rd] = res
+            regs[self.rd] = res
             if self.rd == simulatorContext.PC:
                 self.pcmodified = True
         else:       # STR
-            valWrite = simulatorContext.regs[self.rd]
+            valWrite = regs[self.rd]
             if self.rd == simulatorContext.PC and simulatorContext.PCSpecialBehavior:
                 valWrite += 4       # Special case for PC (see ARM datasheet, 4.9.4)
-            simulatorContext.mem.set(realAddr, valWrite, size=1 if self.byte else 4)
+            simulatorContext.mem.set(realAddr, valWrite, size=self._size)
 
         if self.writeback:
             simulatorContext.regs[self.basereg] = addr
@@ -7,9 +7,8 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class MulLongOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "rdHi", "rdLo", "rs", "rm",
-                                "modifyFlags", "accumulate", "signed"))
+    __slots__ = ("rdHi", "rdLo", "rs", "rm",
+                 "modifyFlags", "accumulate", "signed")
 
     def __init__(self):
         super().__init__()
@@ -85,12 +84,16 @@ class MulLongOp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        return 15 in (self.rdHi, self.rdLo)
+
     def execute(self, simulatorContext):
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
         workingFlags = {}
 
         op1 = simulatorContext.regs[self.rm]
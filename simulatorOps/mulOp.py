@@ -7,9 +7,8 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class MulOp(AbstractOp):
-    saveStateKeys = frozenset(("condition",
-                                "rd", "rn", "rs", "rm",
-                                "modifyFlags", "accumulate"))
+    __slots__ = ("rd", "rn", "rs", "rm",
+                 "modifyFlags", "accumulate")
 
     def __init__(self):
         super().__init__()
@@ -76,12 +75,16 @@ class MulOp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        return self.rd == 15
+
     def execute(self, simulatorContext):
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
         
         op1 = simulatorContext.regs[self.rm]
         op2 = simulatorContext.regs[self.rs]
@@ -94,11 +97,10 @@ class MulOp(AbstractOp):
 
         simulatorContext.regs[self.rd] = res & 0xFFFFFFFF
 
-        # Z and V are set, C is set to "meaningless value" (see ARM spec 4.7.2), V is unaffected
-        workingFlags = {}
-        workingFlags['Z'] = res == 0
-        workingFlags['N'] = res & 0x80000000  # "N flag will be set to the value of bit 31 of the result" (4.5.1)
-        workingFlags['C'] = 0       # I suppose "0" can be qualified as a meaningless value...
-
         if self.modifyFlags:
+            # Z and V are set, C is set to "meaningless value" (see ARM spec 4.7.2), V is unaffected
+            workingFlags = {}
+            workingFlags['Z'] = res == 0
+            workingFlags['N'] = res & 0x80000000  # "N flag will be set to the value of bit 31 of the result" (4.5.1)
+            workingFlags['C'] = 0       # I suppose "0" can be qualified as a meaningless value...
             simulatorContext.regs.setAllFlags(workingFlags)
@@ -8,9 +8,8 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class MultipleMemOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "mode", "pre", "sign", "sbit", "writeback",
-                                "basereg", "regbitmap", "reglist"))
+    __slots__ = ("mode", "pre", "sign", "sbit", "writeback",
+                 "basereg", "regbitmap", "reglist")
 
     def __init__(self):
         super().__init__()
@@ -158,13 +157,18 @@ class MultipleMemOp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        # With the S bit, the user bank is used or SPSR is copied into CPSR
+        return self.sbit or (self.mode == "LDR" and 15 in self.reglist) or (self.writeback and self.basereg == 15)
+
     def execute(self, simulatorContext):
         self.pcmodified = False
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
         # "The lowest-numbereing register is stored to the lowest memory address, through the
         # highest-numbered register to the highest memory address"
@@ -7,7 +7,7 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class NopOp(AbstractOp):
-    saveStateKeys = frozenset(("condition",))
+    __slots__ = ()
 
     def __init__(self):
         super().__init__()
@@ -42,10 +42,14 @@ class NopOp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        return False
+
     def execute(self, simulatorContext):
         # Whatever happens, a NOP instruction does nothing
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
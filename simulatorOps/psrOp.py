@@ -7,9 +7,8 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class PSROp(AbstractOp):
-    saveStateKeys = frozenset(("condition", 
-                                "usespsr", "modeWrite", "flagsOnly", "imm",
-                                "rd", "val", "shift", "opcode"))
+    __slots__ = ("usespsr", "modeWrite", "flagsOnly", "imm",
+                 "rd", "val", "shift", "opcode")
 
     def __init__(self):
         super().__init__()
@@ -88,12 +87,17 @@ class PSROp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        # Writing CPSR may change the processor mode (and so the register bank)
+        return self.modeWrite or self.rd == 15
+
     def execute(self, simulatorContext):
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
         if self.modeWrite:
             if self.usespsr and simulatorContext.regs.mode == "User":
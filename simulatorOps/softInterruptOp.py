@@ -7,7 +7,7 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class SoftInterruptOp(AbstractOp):
-    saveStateKeys = frozenset(("condition", "datauser"))
+    __slots__ = ("datauser",)
 
     def __init__(self):
         super().__init__()
@@ -44,9 +44,9 @@ class SoftInterruptOp(AbstractOp):
         self.pcmodified = False
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
         keepPC = simulatorContext.regs[15]
         # We enter a software interrupt
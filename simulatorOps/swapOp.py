@@ -7,8 +7,7 @@ import simulatorOps.utils as utils
 from simulatorOps.abstractOp import AbstractOp, ExecutionException
 
 class SwapOp(AbstractOp):
-    saveStateKeys = frozenset(("condition",
-                                "byte", "rm", "rd", "rn"))
+    __slots__ = ("byte", "rm", "rd", "rn")
 
     def __init__(self):
         super().__init__()
@@ -67,12 +66,16 @@ class SwapOp(AbstractOp):
         simulatorContext.regs.reactivateBreakpoints()
         return disassembly, description
     
+    @property
+    def endsBasicBlock(self):
+        return self.rd == 15
+
     def execute(self, simulatorContext):
         if not self._checkCondition(simulatorContext.regs):
             # Nothing to do, instruction not executed
-            self.countExecConditionFalse += 1
+            simulatorContext.countExecConditionFalse[self.__class__] += 1
             return
-        self.countExec += 1
+        simulatorContext.countExec[self.__class__] += 1
 
         addr = simulatorContext.regs[self.rn]
         s = 1 if self.byte else 4
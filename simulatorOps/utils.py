@@ -114,6 +114,30 @@ conditionFlagsMapping =    {'EQ': {'Z'},
                             'LE': {'N', 'V', 'Z'},
                             'AL': set()}
 
+def _conditionHolds(cond, nzcv):
+    n, z, c, v = bool(nzcv & 8), bool(nzcv & 4), bool(nzcv & 2), bool(nzcv & 1)
+    # See Table 4-2 of ARM7TDMI data sheet as reference of these conditions
+    return {'EQ': z, 'NE': not z,
+            'CS': c, 'CC': not c,
+            'MI': n, 'PL': not n,
+            'VS': v, 'VC': not v,
+            'HI': c and not z, 'LS': not c or z,
+            'GE': n == v, 'LT': n != v,
+            'GT': not z and n == v, 'LE': z or n != v,
+            'AL': True}[cond]
+
+# Condition evaluation table, indexed first by the condition code (instrInt >> 28)
+# and then by the NZCV nibble of CPSR (CPSR >> 28). The invalid condition code (15)
+# has no row, the instruction must be rejected before using this table.
+conditionTable = tuple(tuple(_conditionHolds(conditionMappingR[code], nzcv) for nzcv in range(16))
+                       if code in conditionMappingR else None
+                       for code in range(16))
+
+# Flags read by each condition, indexed by the condition code
+conditionFlagsTable = tuple(frozenset(conditionFlagsMapping[conditionMappingR[code]])
+                            if code in conditionMappingR else None
+                            for code in range(16))
+
 updateModeLDMMapping = {'ED': 3, 'IB': 3,
                         'FD': 1, 'IA': 1,
                         'EA': 2, 'DB': 2,
@@ -261,50 +285,51 @@ def shiftToInstruction(shift):
     return str
 
 
+def shiftLSL(val, amount, cflag):
+    if amount == 0:                 # If there is no shift
+        # "LSL #0 is a special case, where the shifter carry out is the old value of the CPSR C flag."
+        # (ARM Ref 4.5.2)
+        return cflag, val
+    return (val >> (32-amount)) & 1, (val << amount) & 0xFFFFFFFF
+
+def shiftLSR(val, amount, cflag):
+    if amount == 0:
+        # Special case : "The form of the shift field which might be expected to correspond to LSR #0 is used to
+        # encode LSR #32, which has a zero result with bit 31 of Rm as the carry output."
+        return (val >> 31) & 1, 0
+    return (val >> (amount-1)) & 1, (val >> amount) & 0xFFFFFFFF
+
+def shiftASR(val, amount, cflag):
+    if amount == 0:
+        # Special case : "The form of the shift field which might be expected to give ASR #0 is used to encode
+        # ASR #32. Bit 31 of Rm is again used as the carry output, and each bit of operand 2 is
+        # also equal to bit 31 of Rm. The result is therefore all ones or all zeros, according to the
+        # value of bit 31 of Rm."
+        carryOut = (val >> 31) & 1
+        return carryOut, 0 if carryOut == 0 else 0xFFFFFFFF
+    return (val >> (amount-1)) & 1, (val >> amount) | ((val >> 31) * ((2**amount-1) << (32-amount)))
+
+def shiftROR(val, amount, cflag):
+    if amount == 0:
+        # The form of the shift field which might be expected to give ROR #0 is used to encode
+        # a special function of the barrel shifter, rotate right extended (RRX).
+        return val & 1, (val >> 1) | (int(cflag) << 31)
+    return (val >> (amount-1)) & 1, ((val & (2**32-1)) >> amount%32) | (val << (32-(amount%32)) & (2**32-1))
+
+# Shift functions, called with (value, shift amount, current carry flag) and returning (carry out, shifted value)
+# The current carry flag is only used by LSL #0 (which returns it as is) and by RRX (ROR #0)
+shiftFunctions = {'LSL': shiftLSL,
+                  'LSR': shiftLSR,
+                  'ASR': shiftASR,
+                  'ROR': shiftROR}
+
 def applyShift(val, shift, cflag):
     """
     Apply the shifting operation described by `shift` to `val`.
     The shift value MUST be an immediate (that is, shift.immediate must be true)
     `cflag` should contain the current value of the carry flag (used only for RRX)
     """
-    carryOut = 0
-    if shift.type == "LSL":
-        if shift.value == 0:            # If there is no shift
-            # "LSL #0 is a special case, where the shifter carry out is the old value of the CPSR C flag."
-            # (ARM Ref 4.5.2)
-            return cflag, val
-        carryOut = (val >> (32-shift.value)) & 1
-        val = (val << shift.value) & 0xFFFFFFFF
-    elif shift.type == "LSR":
-        if shift.value == 0:
-            # Special case : "The form of the shift field which might be expected to correspond to LSR #0 is used to
-            # encode LSR #32, which has a zero result with bit 31 of Rm as the carry output."
-            carryOut = (val >> 31) & 1
-            val = 0
-        else:
-            carryOut = (val >> (shift.value-1)) & 1
-            val = (val >> shift.value) & 0xFFFFFFFF
-    elif shift.type == "ASR":
-        if shift.value == 0:
-            # Special case : "The form of the shift field which might be expected to give ASR #0 is used to encode
-            # ASR #32. Bit 31 of Rm is again used as the carry output, and each bit of operand 2 is
-            # also equal to bit 31 of Rm. The result is therefore all ones or all zeros, according to the
-            # value of bit 31 of Rm."
-            carryOut = (val >> 31) & 1
-            val = 0 if carryOut == 0 else 0xFFFFFFFF
-        else:
-            carryOut = (val >> (shift.value-1)) & 1
-            val = (val >> shift.value) | ((val >> 31) * ((2**shift.value-1) << (32-shift.value)))
-    elif shift.type == "ROR":
-        if shift.value == 0:
-            # The form of the shift field which might be expected to give ROR #0 is used to encode
-            # a special function of the barrel shifter, rotate right extended (RRX).
-            carryOut = val & 1
-            val = (val >> 1) | (int(cflag) << 31)
-        else:
-            carryOut = (val >> (shift.value-1)) & 1
-            val = ((val & (2**32-1)) >> shift.value%32) | (val << (32-(shift.value%32)) & (2**32-1))
-    return carryOut, val
+    return shiftFunctions[shift.type](val, shift.value, cflag)
 
 
 ##############################################################################
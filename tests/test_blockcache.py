@@ -0,0 +1,231 @@
+import glob
+import pytest
+
+from testhelpers import build, lineOf, referenceStates, state, stepTo
+
+
+# The STR rewrites an instruction further in the block currently running,
+# which must be executed with its new content
+rewriteAheadProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =cible
+LDR R1, =nouvelle
+LDR R2, [R1]
+MOV R3, #0
+STR R2, [R0]
+cible
+ADD R3, R3, #1
+ADD R3, R3, #2
+fin
+B fin
+
+nouvelle
+ADD R3, R3, #100
+
+SECTION DATA
+"""
+
+# The STR rewrites the first instruction of the loop, already translated in a cached block
+rewriteBehindProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+MOV R3, #0
+LDR R0, =cible
+LDR R1, =nouvelle
+LDR R2, [R1]
+MOV R4, #3
+encore
+cible
+ADD R3, R3, #1
+STR R2, [R0]
+SUBS R4, R4, #1
+BNE encore
+fin
+B fin
+
+nouvelle
+ADD R3, R3, #100
+
+SECTION DATA
+"""
+
+# A single long block, executed many times, with an interrupt handler counting the interrupts
+longBlockProgram = """SECTION INTVEC
+B main
+B main
+B main
+B main
+B main
+B main
+B irqhandler
+B main
+
+SECTION CODE
+main
+MOV R0, #0
+MOV R1, #0
+MOV R4, #0
+boucle
+ADD R0, R0, #1
+ADD R0, R0, #2
+ADD R0, R0, #3
+EOR R2, R0, R1
+ADD R0, R0, #4
+ADD R0, R0, #5
+ORR R2, R2, R0
+ADD R4, R4, #1
+CMP R4, #40
+BNE boucle
+fin
+B fin
+
+irqhandler
+ADD R1, R1, #1
+SUBS PC, LR, #4
+
+SECTION DATA
+"""
+
+
+def runUntilStopped(interpreter, maxit=10000):
+    interpreter.sim.maxit = maxit
+    stops = []
+    while not interpreter.getErrors():
+        interpreter.execute('run')
+        stops.append(interpreter.getCycleCount())
+        assert len(stops) < 1000
+    return stops
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob("simulatorTests/*.asm")))
+def test_run_matches_step(path):
+    # The programs end with an error (they go past their last instruction)
+    with open(path) as f:
+        source = f.read()
+    interpreter = build(source)
+    runUntilStopped(interpreter, maxit=500)
+    reference = stepTo(build(source), interpreter.getCycleCount())
+    assert state(interpreter) == state(reference)
+
+
+@pytest.mark.parametrize("source,expected", [(rewriteAheadProgram, 102), (rewriteBehindProgram, 201)],
+                         ids=["ahead", "behind"])
+def test_selfmodifying_code(source, expected):
+    interpreter = build(source)
+    interpreter.sim.maxit = 100
+    interpreter.execute('run')
+    assert interpreter.getRegisters()['User'][3] == expected
+    assert state(interpreter) == state(stepTo(build(source), interpreter.getCycleCount()))
+
+
+def test_breakpoint_splits_block():
+    source = longBlockProgram
+    eorLine = lineOf(source, "EOR R2, R0, R1")
+    interpreter = build(source)
+    interpreter.sim.maxit = 30
+    # The loop block is translated and cached before the breakpoint is set
+    interpreter.execute('run')
+    assert interpreter.sim.blockCache.blocks
+    interpreter.setBreakpointInstr([eorLine])
+
+    reference = build(source)
+    for i in range(5):
+        interpreter.sim.maxit = 10000
+        interpreter.execute('run')
+        # We stop right before the instruction, at the same cycle as a step by step execution
+        assert interpreter.getCurrentLine() == eorLine
+        stepTo(reference, interpreter.getCycleCount())
+        assert reference.getCurrentLine() == eorLine
+        assert state(interpreter) == state(reference)
+
+
+@pytest.mark.parametrize("interrupt", [(3, 7, 0), (0, 2, 0), (5, 11, 0)])
+def test_interrupt_cuts_block(interrupt):
+    source = longBlockProgram
+    interpreter = build(source, interrupt)
+    interpreter.sim.maxit = 50
+    reference = build(source, interrupt)
+    while interpreter.getCycleCount() < 600:
+        interpreter.execute('run')
+        stepTo(reference, interpreter.getCycleCount())
+        assert state(interpreter) == state(reference)
+    # The interrupts were taken (the handler counts them)
+    assert interpreter.getRegisters()['User'][1] > 0
+
+
+# A long loop writing the memory, with nothing observing its execution
+turboProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =tableau
+MOV R1, #0
+boucle
+AND R2, R1, #15
+STRB R1, [R0, R2]
+ADD R1, R1, #1
+CMP R1, #2000
+BNE boucle
+fin
+B fin
+
+SECTION DATA
+tableau ALLOC8 16
+"""
+
+def reportedChanges(interpreter):
+    # Registers (of the User bank) and memory bytes reported as changed to the user interface
+    registers, memory = {}, {}
+    for change in interpreter.getChangesFormatted(setCheckpoint=True):
+        if change[0] == "mempartial":
+            memory.update({addr: int(val, 16) for addr, val in change[1]})
+        elif change[0][:1] == "r" and change[0][1:].isdigit():
+            registers[int(change[0][1:])] = int(change[1], 16)
+    return registers, memory
+
+def memoryBytes(interpreter):
+    mem = interpreter.sim.mem
+    return {mem.startAddr[sec] + offset: value for sec, data in mem.data.items() for offset, value in enumerate(data)}
+
+
+@pytest.mark.parametrize("observed", [False, True], ids=["turbo", "observed"])
+def test_turbo_run(observed, monkeypatch):
+    interpreter = build(turboProgram)
+    suspended = []
+    monkeypatch.setattr(interpreter.sim.history, "suspend",
+                        lambda original=interpreter.sim.history.suspend: suspended.append(1) or original())
+    if observed:
+        # A breakpoint on a register never written, the run must not skip any check
+        interpreter.setBreakpointRegister("user", 9, "w")
+    interpreter.getChangesFormatted(setCheckpoint=True)
+    registersBefore = interpreter.getRegisters()['User']
+    memoryBefore = memoryBytes(interpreter)
+
+    interpreter.sim.maxit = 5000
+    interpreter.execute('run')
+    assert bool(suspended) != observed
+    reference = referenceStates(turboProgram, interpreter.getCycleCount())
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+
+    # The changes made by the cycles executed without history are still reported
+    registers, memory = reportedChanges(interpreter)
+    registersAfter = interpreter.getRegisters()['User']
+    for reg, val in registersAfter.items():
+        if val != registersBefore[reg]:
+            assert registers[reg] == val
+    assert all(registersAfter[reg] == val for reg, val in registers.items())
+    memoryAfter = memoryBytes(interpreter)
+    assert {addr: val for addr, val in memoryAfter.items() if val != memoryBefore[addr]}.items() <= memory.items()
+    assert all(memoryAfter[addr] == val for addr, val in memory.items())
+
+    # The last cycles of the run can still be stepped back
+    for i in range(interpreter.sim.history.maxlen - 2):
+        interpreter.stepBack(1)
+        assert not interpreter.getErrors()
+        assert state(interpreter) == reference[interpreter.getCycleCount()]
@@ -0,0 +1,121 @@
+import random
+import pytest
+
+from testhelpers import build, lineOf
+
+
+breakpointsProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =mot
+LDR R1, [R0]
+ADD R1, R1, #1
+STR R1, [R0]
+MOVS R2, #0
+fin
+B fin
+
+SECTION DATA
+mot ASSIGN32 5
+autre ASSIGN32 6
+"""
+
+
+def stops(interpreter, maxstops=5):
+    # Lines where a run stops, until it reaches the end of the program
+    interpreter.sim.maxit = 100
+    lines = []
+    finLine = lineOf(breakpointsProgram, "B fin")
+    while interpreter.getCurrentLine() != finLine and len(lines) < maxstops:
+        interpreter.execute('run')
+        lines.append(interpreter.getCurrentLine())
+    return lines
+
+
+def test_breakpoints_index():
+    interpreter = build(breakpointsProgram)
+    mem = interpreter.sim.mem
+    base = mem.startAddr['DATA']
+    rng = random.Random(6)
+    model = {}
+    for i in range(300):
+        addr = base + rng.randrange(16)
+        mode = rng.choice(('r', 'w', 'rw', 'e', 're', ''))
+        modeOctal = 4*('r' in mode) + 2*('w' in mode) + 1*('e' in mode)
+        action = rng.randrange(3)
+        if action == 0:
+            interpreter.setBreakpointMem(addr, mode)
+            model[addr] = modeOctal
+        elif action == 1:
+            mem.toggleBreakpoint(addr, modeOctal)
+            model[addr] = model.get(addr, 0) ^ modeOctal
+        else:
+            mem.removeBreakpoint(addr)
+            model[addr] = 0
+        model = {a: m for a, m in model.items() if m}
+
+        assert mem.breakpoints == model
+        assert mem.breakpointsIndex == {mode: sorted(a for a, m in model.items() if m & mode) for mode in (1, 2, 4)}
+        assert mem.hasBreakpoints() == bool(model)
+        expected = {'r': [], 'w': [], 'rw': [], 'e': []}
+        for a, m in model.items():
+            if m & 6:
+                expected[{4: 'r', 2: 'w', 6: 'rw'}[m & 6]].append(a)
+            if m & 1:
+                expected['e'].append(a)
+        assert {k: sorted(v) for k, v in interpreter.getBreakpointsMem().items()} == {k: sorted(v) for k, v in expected.items()}
+        # Breakpoint found for an access: the one at the lowest address (execution before read)
+        for size in (1, 2, 4):
+            for modeOctal in (1, 2, 4, 5):
+                addr = base + rng.randrange(16)
+                found = None
+                for a in range(addr, addr + size):
+                    for m in (1, 4, 2):
+                        if model.get(a, 0) & m & modeOctal and found is None:
+                            found = (a, m)
+                assert mem._findBreakpoint(addr, size, modeOctal) == found
+                assert mem.hasBreakpoint(addr, size, modeOctal) == (found is not None)
+
+
+@pytest.mark.parametrize("offset,mode,expected", [
+    (2, 'r', ["LDR R1, [R0]"]),
+    (3, 'w', ["STR R1, [R0]"]),
+    (0, 'rw', ["LDR R1, [R0]", "STR R1, [R0]"]),
+    (4, 'rw', []),
+])
+def test_memory_breakpoint_stops(offset, mode, expected):
+    interpreter = build(breakpointsProgram)
+    interpreter.setBreakpointMem(interpreter.sim.mem.startAddr['DATA'] + offset, mode)
+    lines = [lineOf(breakpointsProgram, text) for text in expected] + [lineOf(breakpointsProgram, "B fin")]
+    assert stops(interpreter) == lines
+    # The memory was written anyway once the run resumed
+    assert interpreter.sim.mem.get(interpreter.sim.mem.startAddr["DATA"], mayTriggerBkpt=False)[0] == 6
+
+
+def test_write_breakpoint_before_write():
+    interpreter = build(breakpointsProgram)
+    mem = interpreter.sim.mem
+    interpreter.setBreakpointMem(mem.startAddr['DATA'] + 1, 'w')
+    interpreter.sim.maxit = 100
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(breakpointsProgram, "STR R1, [R0]")
+    assert interpreter.getRegisters()['User'][1] == 6
+    assert mem.get(mem.startAddr["DATA"], mayTriggerBkpt=False)[0] == 5
+
+
+def test_register_and_flag_breakpoints():
+    interpreter = build(breakpointsProgram)
+    interpreter.setBreakpointRegister("user", 1, "w")
+    interpreter.setBreakpointFlag("z", "w")
+    assert stops(interpreter) == [lineOf(breakpointsProgram, text) for text in
+                                  ("LDR R1, [R0]", "ADD R1, R1, #1", "MOVS R2, #0", "B fin")]
+    # Removing the breakpoints
+    interpreter = build(breakpointsProgram)
+    interpreter.setBreakpointRegister("user", 1, "w")
+    interpreter.setBreakpointFlag("z", "w")
+    interpreter.setBreakpointRegister("user", 1, "")
+    interpreter.setBreakpointFlag("z", "")
+    assert not interpreter.sim.regs.hasBreakpoints()
+    assert stops(interpreter) == [lineOf(breakpointsProgram, "B fin")]
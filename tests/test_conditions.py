@@ -0,0 +1,54 @@
+import itertools
+import pytest
+
+from testhelpers import build, lineOf
+from simulatorOps.abstractOp import ExecutionException
+
+
+conditions = ("EQ", "NE", "CS", "CC", "MI", "PL", "VS", "VC", "HI", "LS", "GE", "LT", "GT", "LE", "AL")
+
+# For each condition, a MOV to R0 executed only if the condition holds
+conditionsProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+""" + "".join("MOV R0, #0\nMOV{} R0, #1\n".format(cond) for cond in conditions) + """fin
+B fin
+
+SECTION DATA
+"""
+
+
+def conditionHolds(cond, n, z, c, v):
+    # Table 4-2 of the ARM7TDMI data sheet
+    return {"EQ": z, "NE": not z, "CS": c, "CC": not c, "MI": n, "PL": not n, "VS": v, "VC": not v,
+            "HI": c and not z, "LS": not c or z, "GE": n == v, "LT": n != v,
+            "GT": not z and n == v, "LE": z or n != v, "AL": True}[cond]
+
+
+def test_conditions():
+    interpreter = build(conditionsProgram)
+    for cond in conditions:
+        line = lineOf(conditionsProgram, "MOV{} R0, #1".format(cond))
+        while interpreter.getCurrentLine() != line:
+            interpreter.execute('into')
+        for n, z, c, v in itertools.product((False, True), repeat=4):
+            for flag, value in zip("NZCV", (n, z, c, v)):
+                interpreter.setFlags(flag, value)
+            interpreter.execute('into')
+            assert not interpreter.getErrors()
+            assert interpreter.getRegisters()['User'][0] == conditionHolds(cond, n, z, c, v), (cond, n, z, c, v)
+            stats = interpreter.sim.executionStats()["data"]
+            assert stats == ((1, 0) if conditionHolds(cond, n, z, c, v) else (0, 1))
+            interpreter.stepBack(1)
+            assert interpreter.getCurrentLine() == line
+
+
+def test_invalid_condition():
+    interpreter = build(conditionsProgram)
+    # MOV R0, #1 with the condition code 15, which does not exist
+    instr = interpreter.sim.decodeInstr(0xF3A00001)
+    assert not instr.conditionValid
+    with pytest.raises(ExecutionException, match="la condition demandée n'existe pas"):
+        instr._checkCondition(interpreter.sim.regs)
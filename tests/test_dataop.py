@@ -0,0 +1,166 @@
+import random
+import pytest
+
+from testhelpers import build, lineOf
+
+
+M = 0xFFFFFFFF
+
+logical = {"AND": lambda a, b: a & b, "EOR": lambda a, b: a ^ b, "ORR": lambda a, b: a | b,
+           "BIC": lambda a, b: a & ~b, "TST": lambda a, b: a & b, "TEQ": lambda a, b: a ^ b,
+           "MOV": lambda a, b: b, "MVN": lambda a, b: ~b}
+# Operands of the equivalent addition, with the carry in c
+arithmetic = {"ADD": lambda a, b, c: (a, b, 0), "CMN": lambda a, b, c: (a, b, 0),
+              "SUB": lambda a, b, c: (a, ~b & M, 1), "CMP": lambda a, b, c: (a, ~b & M, 1),
+              "RSB": lambda a, b, c: (~a & M, b, 1), "ADC": lambda a, b, c: (a, b, c),
+              "SBC": lambda a, b, c: (a, ~b & M, c), "RSC": lambda a, b, c: (~a & M, b, c)}
+
+# The shifts by a register are not covered: the simulator only supports immediate shift amounts
+operands2 = ["R1", "R1, LSL #3", "R1, LSR #1", "R1, LSR #32", "R1, ASR #31", "R1, ASR #32", "R1, ROR #5", "R1, RRX",
+             "#0xFF000000", "#0x3F0"]
+
+program = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+{}
+fin
+B fin
+
+SECTION DATA
+"""
+
+
+def shifter(operand2, r1, r2, cin):
+    # Barrel shifter: return (carry out, value), see ARM Instr. set, 4.5.2
+    if operand2.startswith("#"):
+        val = int(operand2[1:], 16)
+        # The assembler encodes these immediates with a rotation
+        return val >> 31, val
+    if operand2 == "R1":
+        return cin, r1
+    kind, amount = operand2[4:7], operand2[8:]
+    if kind == "RRX":
+        return r1 & 1, (cin << 31) | (r1 >> 1)
+    if amount == "R2":
+        amount = r2 & 0xFF
+        if amount == 0:
+            return cin, r1
+    else:
+        amount = int(amount[1:])
+    if kind == "LSL":
+        if amount >= 32:
+            return (r1 & 1 if amount == 32 else 0), 0
+        return (r1 >> (32 - amount)) & 1, (r1 << amount) & M
+    if kind == "LSR":
+        if amount >= 32:
+            return (r1 >> 31 if amount == 32 else 0), 0
+        return (r1 >> (amount - 1)) & 1, r1 >> amount
+    if kind == "ASR":
+        if amount >= 32:
+            return r1 >> 31, M if r1 >> 31 else 0
+        signed = r1 - (1 << 32) if r1 >> 31 else r1
+        return (r1 >> (amount - 1)) & 1, (signed >> amount) & M
+    # ROR
+    amount %= 32
+    if amount == 0:
+        return r1 >> 31, r1
+    return (r1 >> (amount - 1)) & 1, ((r1 >> amount) | (r1 << (32 - amount))) & M
+
+
+def expected(opcode, operand2, r0, r1, r2, flags):
+    # Return the result (None if not written) and the NZCV flags
+    n, z, c, v = flags
+    shiftCarry, op2 = shifter(operand2, r1, r2, c)
+    if opcode in logical:
+        res = logical[opcode](r0, op2) & M
+        c = shiftCarry
+    else:
+        a, b, cin = arithmetic[opcode](r0, op2, c)
+        res = (a + b + cin) & M
+        c = int(a + b + cin > M)
+        v = int((a >> 31) == (b >> 31) != (res >> 31))
+    written = None if opcode in ("TST", "TEQ", "CMP", "CMN") else res
+    return written, (res >> 31, int(res == 0), c, v)
+
+
+def instruction(opcode, operand2):
+    if opcode in ("MOV", "MVN"):
+        return "{}S R3, {}".format(opcode, operand2)
+    if opcode in ("TST", "TEQ", "CMP", "CMN"):
+        return "{} R0, {}".format(opcode, operand2)
+    return "{}S R3, R0, {}".format(opcode, operand2)
+
+
+@pytest.mark.parametrize("operand2", operands2)
+@pytest.mark.parametrize("opcode", sorted(logical) + sorted(arithmetic))
+def test_dataop(opcode, operand2):
+    instr = instruction(opcode, operand2)
+    source = program.format(instr)
+    interpreter = build(source)
+    interpreter.execute('into')
+    assert interpreter.getCurrentLine() == lineOf(source, instr)
+    rng = random.Random(opcode + operand2)
+    values = (0, 1, 2, 0x7FFFFFFF, 0x80000000, 0xFFFFFFFF)
+    for i in range(40):
+        r0, r1 = (rng.choice(values) if rng.random() < 0.3 else rng.getrandbits(32) for j in range(2))
+        r2 = rng.choice((0, 1, 4, 31, 32, 33, 0x120))
+        flags = tuple(rng.randrange(2) for flag in "NZCV")
+        for reg, val in ((0, r0), (1, r1), (2, r2), (3, 0xDEADBEEF)):
+            interpreter.setRegisters("User", reg, val)
+        for flag, val in zip("NZCV", flags):
+            interpreter.setFlags(flag, bool(val))
+        interpreter.execute('into')
+        assert not interpreter.getErrors()
+
+        res, nzcv = expected(opcode, operand2, r0, r1, r2, flags)
+        result = interpreter.getRegisters()['User'][3]
+        assert result == (0xDEADBEEF if res is None else res), (r0, r1, r2, flags)
+        cpsr = interpreter.getFlags()
+        assert tuple(int(cpsr[flag]) for flag in "NZCV") == nzcv, (r0, r1, r2, flags)
+        interpreter.stepBack(1)
+
+
+memProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =donnees
+LDRB R1, [R0, #1]
+LDRSB R2, [R0, #1]
+LDRH R3, [R0, #2]
+LDRSH R4, [R0, #2]
+LDRSH R5, [R0], #2
+LDRSB R6, [R0, #1]!
+LDR R7, =0x1234
+STRH R7, [R0, #1]!
+STRB R7, [R0], #-2
+LDR R8, =donnees
+LDR R9, [R8]
+LDR R10, [R8, #4]
+fin
+B fin
+
+SECTION DATA
+donnees ASSIGN8 0x01, 0x80, 0xFE, 0xFF, 0x7F, 0x00, 0x00, 0x00
+"""
+
+
+def test_memory_loads_and_stores():
+    interpreter = build(memProgram)
+    interpreter.setBreakpointInstr([lineOf(memProgram, "B fin")])
+    interpreter.sim.maxit = 100
+    interpreter.execute('run')
+    regs = interpreter.getRegisters()['User']
+    base = regs[8]
+    assert (regs[1], regs[2]) == (0x80, 0xFFFFFF80)
+    assert (regs[3], regs[4]) == (0xFFFE, 0xFFFFFFFE)
+    # Post-indexed, then pre-indexed with writeback
+    assert regs[5] == 0xFFFF8001
+    assert regs[6] == 0xFFFFFFFF
+    # STRH at base+4, then STRB at base+4 with R0 written back to base+2
+    assert regs[0] == base + 2
+    assert regs[9] == 0xFFFE8001
+    assert regs[10] == 0x1234
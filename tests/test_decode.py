@@ -0,0 +1,92 @@
+import struct
+
+from testhelpers import build, lineOf, stepTo
+from simulatorOps.abstractOp import AbstractOp
+
+
+# The same instructions appear at several addresses, and the loop executes them many times
+repeatedProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+MOV R0, #0
+MOV R4, #3
+ADD R0, R0, #1
+boucle
+ADD R0, R0, #1
+SUBS R4, R4, #1
+BNE boucle
+MOVNE R5, #1
+ADD R0, R0, #1
+fin
+B fin
+
+SECTION DATA
+"""
+
+# Attributes updated each time an instruction is executed (all the others are decoded once)
+executionSlots = set(AbstractOp.__slots__) - {"instrInt", "condition", "conditionValid", "_type"}
+
+
+def decodedFields(instr):
+    slots = [name for cls in type(instr).__mro__ for name in getattr(cls, "__slots__", ())]
+    return {name: getattr(instr, name, None) for name in slots if name not in executionSlots}
+
+def instrAtLine(interpreter, source, text):
+    # Decoded instruction object of the first line holding exactly `text`
+    addr = interpreter.line2addr[lineOf(source, text)]
+    sim = interpreter.sim
+    instrInt = struct.unpack("<I", sim.mem.get(addr, size=4, execMode=True))[0]
+    return sim.decodeInstr(instrInt)
+
+
+def test_same_bytecode_same_instruction():
+    interpreter = build(repeatedProgram)
+    stepTo(interpreter, 10)
+    sim = interpreter.sim
+    # The three ADD share a single bytecode, decoded once
+    add = instrAtLine(interpreter, repeatedProgram, "ADD R0, R0, #1")
+    assert sum(instr is add for instr in sim.decoderCache.values()) == 1
+    lines = [i for i, text in enumerate(repeatedProgram.split("\n")) if text == "ADD R0, R0, #1"]
+    bytecodes = {bytes(sim.mem.get(interpreter.line2addr[line], size=4, execMode=True)) for line in lines}
+    assert len(bytecodes) == 1
+    assert sim.decodeInstr(struct.unpack("<I", bytecodes.pop())[0]) is add
+    # The blocks of the run mode execute the same objects
+    interpreter.sim.maxit = 100
+    interpreter.execute('run')
+    assert all(instr is sim.decoderCache[instr.instrInt]
+               for block in sim.blockCache.blocks.values() for instr in block.instrs)
+
+
+def test_execution_keeps_decoded_fields():
+    interpreter = build(repeatedProgram)
+    stepTo(interpreter, 3)
+    before = {instrInt: decodedFields(instr) for instrInt, instr in interpreter.sim.decoderCache.items()}
+    stepTo(interpreter, 20)
+    after = {instrInt: decodedFields(instr) for instrInt, instr in interpreter.sim.decoderCache.items()}
+    assert {instrInt: after[instrInt] for instrInt in before} == before
+
+
+def test_execution_counters():
+    finLine = lineOf(repeatedProgram, "B fin")
+    expected = {"data": (10, 1), "branch": (3, 1)}
+
+    interpreter = build(repeatedProgram)
+    interpreter.setBreakpointInstr([finLine])
+    interpreter.sim.maxit = 100
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == finLine
+    stats = interpreter.sim.executionStats()
+    assert {kind: stats[kind] for kind in expected} == expected
+    assert all(stats[kind] == (0, 0) for kind in stats if kind not in expected)
+
+    # The counters only cover the last execution
+    reference = build(repeatedProgram)
+    total = {kind: (0, 0) for kind in expected}
+    while reference.getCurrentLine() != finLine:
+        reference.execute('into')
+        stats = reference.sim.executionStats()
+        assert sum(map(sum, stats.values())) == 1
+        total = {kind: (total[kind][0] + stats[kind][0], total[kind][1] + stats[kind][1]) for kind in expected}
+    assert total == expected
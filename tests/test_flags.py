@@ -0,0 +1,137 @@
+import pytest
+
+from testhelpers import build, lineOf, referenceStates, state
+
+
+# The CMN sets NZCV to 1001 before the operations tested, so that the flags they leave
+# unaffected are known
+flagsProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, ={op1}
+LDR R1, ={op2}
+LDR R6, =0x7FFFFFFF
+MOV R7, #1
+CMN R6, R7
+{ops}
+MRS R5, CPSR
+fin
+B fin
+
+SECTION DATA
+"""
+
+flagsCases = [
+    # Arithmetic operations
+    ("ADDS R2, R0, R1", 0xFFFFFFFF, 1, 0b0110),
+    ("SUBS R2, R0, R1", 0x80000000, 1, 0b0011),
+    ("CMP R0, R1", 1, 2, 0b1000),
+    ("CMN R0, R1", 0x7FFFFFFF, 1, 0b1001),
+    ("RSBS R2, R0, #0", 0, 0, 0b0110),
+    # Logical operations (V is unaffected, C is the carry out of the barrel shifter, if any)
+    ("ANDS R2, R0, R1", 0xF0, 0x0F, 0b0101),
+    ("MOVS R2, R0, LSL #1", 0x80000001, 0, 0b0011),
+    ("TST R0, R1, LSR #1", 0xFFFFFFFF, 1, 0b0111),
+    ("EORS R2, R0, R1", 5, 5, 0b0101),
+    # A logical operation based on the flags of another pending one
+    ("ANDS R2, R0, R1\nORRS R3, R0, R1", 0xF0, 0x0F, 0b0001),
+    ("MOVS R2, R0, LSL #1\nORRS R3, R2, #0", 0x80000001, 0, 0b0011),
+]
+flagsIds = [case[0].replace("\n", " / ") for case in flagsCases]
+
+
+def buildFlags(ops, op1, op2):
+    source = flagsProgram.format(ops=ops, op1=op1, op2=op2)
+    return build(source), source.split("\n")
+
+def nzcv(interpreter):
+    flags = interpreter.getFlags()
+    return flags['N'] << 3 | flags['Z'] << 2 | flags['C'] << 1 | flags['V']
+
+def runTo(interpreter, lines, line):
+    # Run mode (the operations are executed in a block), stopped by a breakpoint
+    interpreter.setBreakpointInstr([lines.index(line)])
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lines.index(line)
+    interpreter.setBreakpointInstr([])
+
+
+@pytest.mark.parametrize("ops,op1,op2,expected", flagsCases, ids=flagsIds)
+def test_flags_cpsr(ops, op1, op2, expected):
+    interpreter, lines = buildFlags(ops, op1, op2)
+    runTo(interpreter, lines, "MRS R5, CPSR")
+    assert interpreter.sim.regs.CPSR >> 28 == expected
+    assert nzcv(interpreter) == expected
+
+
+@pytest.mark.parametrize("ops,op1,op2,expected", flagsCases, ids=flagsIds)
+def test_flags_mrs(ops, op1, op2, expected):
+    interpreter, lines = buildFlags(ops, op1, op2)
+    runTo(interpreter, lines, "B fin")
+    assert interpreter.getRegisters()['User'][5] >> 28 == expected
+    assert nzcv(interpreter) == expected
+
+
+@pytest.mark.parametrize("mode", ["into", "run"])
+@pytest.mark.parametrize("ops,op1,op2,expected", flagsCases, ids=flagsIds)
+def test_flags_stepback(ops, op1, op2, expected, mode):
+    interpreter, lines = buildFlags(ops, op1, op2)
+    ops = ops.split("\n")
+    if mode == "into":
+        while interpreter.getCurrentLine() != lines.index("MRS R5, CPSR"):
+            interpreter.execute('into')
+    else:
+        runTo(interpreter, lines, "MRS R5, CPSR")
+
+    # Right after the last operation, its flags are not computed yet in run mode
+    interpreter.stepBack(1)
+    assert interpreter.getCurrentLine() == lines.index(ops[-1])
+    if len(ops) > 1:
+        interpreter.stepBack(len(ops) - 1)
+    assert interpreter.getCurrentLine() == lines.index(ops[0])
+    assert nzcv(interpreter) == 0b1001
+
+    # The flags are the same when executed again
+    for i in range(len(ops)):
+        interpreter.execute('into')
+    assert nzcv(interpreter) == expected
+    interpreter.execute('into')
+    assert interpreter.getRegisters()['User'][5] >> 28 == expected
+
+
+# The MOVEQ reads the flags of the ADDS, which are not computed yet when a register
+# breakpoint stops it
+breakpointProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+MOV R0, #1
+MVN R1, #0
+ADDS R2, R0, R1
+MOVEQ R8, #1
+MOVCS R9, #2
+fin
+B fin
+
+SECTION DATA
+"""
+
+
+def test_stepback_across_register_breakpoint():
+    interpreter = build(breakpointProgram)
+    interpreter.setBreakpointRegister("user", 8, "w")
+    interpreter.setBreakpointInstr([lineOf(breakpointProgram, "B fin")])
+    interpreter.sim.maxit = 100
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(breakpointProgram, "MOVEQ R8, #1")
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(breakpointProgram, "B fin")
+
+    reference = referenceStates(breakpointProgram, interpreter.getCycleCount())
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+    while interpreter.getCycleCount() > 1:
+        interpreter.stepBack(1)
+        assert state(interpreter) == reference[interpreter.getCycleCount()]
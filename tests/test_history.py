@@ -0,0 +1,393 @@
+import random
+import pytest
+
+from testhelpers import build, lineOf, referenceStates, state, stepTo
+from history import History
+import settings
+
+
+# Each iteration writes the memory and runs a counted loop
+historyProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =tableau
+MOV R1, #0
+boucle
+AND R3, R1, #15
+STR R1, [R0, R3, LSL #2]
+ADD R1, R1, #1
+MOV R4, #6
+compte
+SUBS R4, R4, #1
+BNE compte
+CMP R1, #200
+BLT boucle
+fin
+B fin
+
+SECTION DATA
+tableau ALLOC32 16
+"""
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return referenceStates(historyProgram, 700)
+
+
+class Component:
+    # Minimal component, holding a dictionary of values
+    def __init__(self, history):
+        self.history = history
+        self.values = {}
+        history.registerObject(self)
+
+    def set(self, key, val):
+        self.history.signalChange(self, {key: (self.values.get(key), val)})
+        self.values[key] = val
+
+    def stepBack(self, state):
+        for key, (old, new) in state.items():
+            self.values[key] = old
+
+
+def test_stepback_wraparound(reference, monkeypatch):
+    # A small journal, which is filled many times by the program
+    monkeypatch.setattr(History, "recordsPerCycle", 2)
+    monkeypatch.setitem(settings._settings, "maxhistorylength", 100)
+    interpreter = build(historyProgram)
+    history = interpreter.sim.history
+    stepTo(interpreter, 600)
+    assert history.head > 3 * history.capacity
+    assert history.head - history.tail <= history.capacity
+
+    # The most recent cycles kept in the journal can be stepped back
+    steps = 0
+    while True:
+        interpreter.stepBack(1)
+        if interpreter.getErrors():
+            break
+        steps += 1
+        assert state(interpreter) == reference[interpreter.getCycleCount()]
+    assert "Fin de l'historique" in str(interpreter.getErrors())
+    # Not all the cycles allowed by the history length fit in the journal
+    assert 10 < steps < history.maxlen
+    # We can execute again from there
+    stepTo(interpreter, interpreter.getCycleCount() + 50)
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+
+
+def test_cycles_dropped_by_length():
+    history = History(historyMaxLength=5)
+    component = Component(history)
+    for cycle in range(20):
+        history.newCycle()
+        component.set("a", cycle)
+        component.set("b", -cycle)
+    # Only the last cycles are kept, with their records
+    for cycle in range(19, 14, -1):
+        history.stepBack()
+        assert component.values == {"a": cycle - 1, "b": 1 - cycle}
+    with pytest.raises(RuntimeError):
+        history.stepBack()
+
+
+def test_cycle_larger_than_journal():
+    history = History(historyMaxLength=2)
+    component = Component(history)
+    history.newCycle()
+    component.set("avant", 1)
+    history.newCycle()
+    capacity = history.capacity
+    # A single cycle with more records than the journal can hold
+    for i in range(3 * capacity):
+        component.set(i % 50, i)
+    assert history.capacity > capacity
+    history.stepBack()
+    # All the records of the cycle were kept, and replayed in reverse order
+    assert component.values == {"avant": 1, **{key: None for key in range(50)}}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_checkpoint_diff(seed, monkeypatch):
+    # The diff since the checkpoint holds, for each key changed since then, its value
+    # at the checkpoint and its current value, whatever the records dropped from the journal
+    rng = random.Random(seed)
+    monkeypatch.setattr(History, "recordsPerCycle", 4)
+    history = History(historyMaxLength=4)
+    assert history.capacity == 16
+    # The history knows the components by their class
+    components = [type("Registres", (Component,), {})(history), type("Memoire", (Component,), {})(history)]
+    atCheckpoint = [{}, {}]
+    for i in range(2000):
+        action = rng.random()
+        if action < 0.2:
+            history.newCycle()
+        elif action < 0.25:
+            history.setCheckpoint()
+            atCheckpoint = [{}, {}]
+        elif action < 0.27:
+            if history.recording:
+                history.suspend()
+            else:
+                history.resume()
+        else:
+            comp = rng.randrange(2)
+            key = rng.randrange(6)
+            atCheckpoint[comp].setdefault(key, components[comp].values.get(key))
+            components[comp].set(key, rng.randrange(1000))
+        diff = history.getDiffFromCheckpoint()
+        for component, old in zip(components, atCheckpoint):
+            assert diff[component.__class__] == {key: (val, component.values[key]) for key, val in old.items()}
+    assert history.head > 10 * history.capacity
+
+
+def runUntil(interpreter, ncycles, maxit=100):
+    interpreter.sim.maxit = maxit
+    while interpreter.getCycleCount() < ncycles:
+        interpreter.execute('run')
+
+
+@pytest.fixture
+def shortHistory(monkeypatch):
+    # A short journal, and frequent snapshots
+    monkeypatch.setitem(settings._settings, "maxhistorylength", 20)
+    monkeypatch.setitem(settings._settings, "snapshotinterval", 50)
+
+
+@pytest.mark.parametrize("mode", ["into", "run"])
+def test_goto_cycle(reference, shortHistory, mode):
+    interpreter = build(historyProgram)
+    if mode == "into":
+        stepTo(interpreter, 650)
+    else:
+        # The turbo run does not record its cycles, only the snapshots
+        runUntil(interpreter, 650, maxit=50)
+    end = interpreter.getCycleCount()
+    for cycle in (end - 1, end - 19, end - 25, 599, 437, 400, 399, 101, 50, 3, 2, 1):
+        interpreter.gotoCycle(cycle)
+        assert not interpreter.getErrors()
+        assert state(interpreter) == reference[cycle]
+    # We can execute again from there
+    stepTo(interpreter, 400)
+    assert state(interpreter) == reference[400]
+    # Only the cycles already executed can be reached
+    interpreter.gotoCycle(401)
+    assert "n'a pas encore été exécuté" in str(interpreter.getErrors())
+
+
+def test_goto_cycle_thinned_snapshots(reference, shortHistory, monkeypatch):
+    monkeypatch.setitem(settings._settings, "maxsnapshotsmem", 3000)
+    interpreter = build(historyProgram)
+    history = interpreter.sim.history
+    stepTo(interpreter, 650)
+    assert history.snapshotsBytes <= 3000
+    cycles = [snap.cycle for snap in history.snapshots]
+    assert len(cycles) < 650 // 50
+    # The older snapshots are sparser than the recent ones
+    gaps = [b - a for a, b in zip(cycles, cycles[1:])]
+    assert gaps[0] > gaps[-1]
+    for cycle in (610, 420, 177, 2):
+        interpreter.gotoCycle(cycle)
+        assert state(interpreter) == reference[cycle]
+
+
+def test_goto_cycle_after_user_edit(shortHistory):
+    # A change made by the user is seen by the cycles executed again
+    interpreter = build(historyProgram)
+    stepTo(interpreter, 180)
+    interpreter.setRegisters("User", 9, 77)
+    stepTo(interpreter, 300)
+    interpreter.gotoCycle(190)
+
+    reference = build(historyProgram)
+    stepTo(reference, 180)
+    reference.setRegisters("User", 9, 77)
+    stepTo(reference, 190)
+    assert state(interpreter) == state(reference)
+    assert interpreter.getRegisters()['User'][9] == 77
+
+
+def reportedRegisters(interpreter):
+    # Values of the User registers reported as changed to the user interface
+    return {int(change[0][1:]): int(change[1], 16) for change in interpreter.getChangesFormatted(setCheckpoint=True)
+            if change[0][:1] == "r" and change[0][1:].isdigit()}
+
+
+@pytest.mark.parametrize("policy,depth", [(("off",), 0), (("last", 10), 10), (("full",), 399),
+                                          (("full", None, 20000), 100)],
+                         ids=["off", "last", "full", "budget"])
+def test_recording_policy(reference, policy, depth):
+    interpreter = build(historyProgram)
+    interpreter.setHistoryPolicy(*policy)
+    history = interpreter.sim.history
+    before = interpreter.getRegisters()['User']
+    # A single run, the changes reported are the ones since its beginning
+    interpreter.sim.maxit = 399
+    interpreter.execute('run')
+    assert state(interpreter) == reference[400]
+    if policy[0] == "off":
+        # Nothing is written in the journal
+        assert history.head == 0
+
+    # The changes are reported whatever the policy
+    after = interpreter.getRegisters()['User']
+    reported = reportedRegisters(interpreter)
+    assert all(after[reg] == val for reg, val in reported.items())
+    assert all(reported[reg] == val for reg, val in after.items() if val != before[reg])
+
+    steps = 0
+    while not interpreter.getErrors() and interpreter.getCycleCount() > 1:
+        interpreter.stepBack(1)
+        if not interpreter.getErrors():
+            steps += 1
+            assert state(interpreter) == reference[interpreter.getCycleCount()]
+    if policy[0] == "full" and len(policy) > 2:
+        # The journal is bounded by the budget, in records
+        assert history.capacity <= 20000 // history.recordBytes
+        assert 1 < steps <= depth
+    else:
+        assert steps == depth
+
+
+@pytest.mark.parametrize("policy", [("full",), ("last", 300)], ids=["full", "last"])
+def test_stepback_batched(reference, policy):
+    interpreter = build(historyProgram)
+    interpreter.setHistoryPolicy(*policy)
+    runUntil(interpreter, 600, maxit=10)
+    # Steps back of several cycles at once
+    for count in (1, 2, 5, 13, 40, 7, 100, 3):
+        interpreter.stepBack(count)
+        assert not interpreter.getErrors()
+        assert state(interpreter) == reference[interpreter.getCycleCount()]
+    # We can execute again from there
+    cycle = interpreter.getCycleCount()
+    stepTo(interpreter, cycle + 150)
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+
+
+def test_stepback_batched_changes(reference):
+    interpreter = build(historyProgram)
+    interpreter.setHistoryPolicy("last", 50)
+    stepTo(interpreter, 300)
+    sim = interpreter.sim
+    before = list(sim.regs.physRegs)
+    beforeMem = {sec: bytes(data) for sec, data in sim.mem.data.items()}
+    changes = sim.stepBack(30)
+    assert state(interpreter) == reference[270]
+    # The changes returned are the (value before, value restored) of each key modified,
+    # possibly with keys modified then restored to the same value
+    regsChanges = {key: val for key, val in changes[type(sim.regs)].items()
+                   if isinstance(key, int) and val[0] != val[1]}
+    assert regsChanges == {i: (old, new) for i, (old, new) in enumerate(zip(before, sim.regs.physRegs)) if old != new}
+    memChanges = {key: val for key, val in changes[type(sim.mem)].items() if val[0] != val[1]}
+    assert memChanges == {(sec, offset): (old, new) for sec in beforeMem
+                          for offset, (old, new) in enumerate(zip(beforeMem[sec], sim.mem.data[sec])) if old != new}
+    assert memChanges
+
+    # Further than the history: we stop at the oldest cycle recorded
+    interpreter.stepBack(100)
+    assert "Fin de l'historique" in str(interpreter.getErrors())
+    assert state(interpreter) == reference[250]
+
+
+def test_changes_reported_after_stepback():
+    interpreter = build(historyProgram)
+    stepTo(interpreter, 100)
+    before = interpreter.getRegisters()['User']
+    stepTo(interpreter, 110)
+    interpreter.getChangesFormatted(setCheckpoint=True)
+    interpreter.stepBack(10)
+    # The registers restored are reported with their restored value
+    reported = reportedRegisters(interpreter)
+    assert reported
+    assert all(before[reg] == val for reg, val in reported.items())
+    after = interpreter.getRegisters()['User']
+    assert after == before
+
+
+def test_folded_checkpoint(reference):
+    interpreter = build(historyProgram)
+    interpreter.setHistoryPolicy("last", 10)
+    history = interpreter.sim.history
+    runUntil(interpreter, 300)
+    regs = interpreter.sim.regs
+    regs.materializeFlags()
+    before = list(regs.physRegs)
+    beforeMem = {sec: bytes(data) for sec, data in interpreter.sim.mem.data.items()}
+
+    # A single run (which sets the checkpoint at its start), observed so that all its cycles
+    # are recorded: the records since the checkpoint are dropped from the journal, they are folded
+    interpreter.setBreakpointRegister("user", 9, "w")
+    start = history.head
+    interpreter.sim.maxit = 350
+    interpreter.execute('run')
+    assert not interpreter.getErrors()
+    assert history.tail > start
+    interpreter.stepBack(3)
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+
+    # The diff since the checkpoint includes the values restored by the step back
+    regs.materializeFlags()
+    diff = history.getDiffFromCheckpoint()
+    regsDiff = {key: val for key, val in diff[type(regs)].items() if isinstance(key, int)}
+    for i, val in enumerate(regs.physRegs):
+        if i in regsDiff:
+            assert regsDiff[i] == (before[i], val)
+        else:
+            assert val == before[i]
+    memData = interpreter.sim.mem.data
+    for (sec, offset), (old, new) in diff[type(interpreter.sim.mem)].items():
+        assert old == beforeMem[sec][offset]
+        assert new == memData[sec][offset]
+
+
+def reverseTarget(reference, end, recorded, line):
+    # Most recent cycle stopped at the line, else the oldest cycle recorded
+    cycles = [c for c, s in reference.items() if end - recorded <= c < end and s[3] == line]
+    return max(cycles, default=end - recorded)
+
+
+@pytest.mark.parametrize("policy", [("full",), ("last", 10)], ids=["full", "last"])
+def test_reverse_continue(reference, policy):
+    strLine = lineOf(historyProgram, "STR R1, [R0, R3, LSL #2]")
+    interpreter = build(historyProgram)
+    interpreter.setHistoryPolicy(*policy)
+    history = interpreter.sim.history
+    runUntil(interpreter, 650, maxit=10)
+    interpreter.setBreakpointInstr([strLine])
+
+    # We stop right before the last execution of the instruction still in the history
+    for i in range(3):
+        end, recorded = interpreter.getCycleCount(), len(history.cycleStarts) - 1
+        interpreter.execute('reverse')
+        assert state(interpreter) == reference[reverseTarget(reference, end, recorded, strLine)]
+
+    # Without breakpoint, we go back to the oldest cycle recorded
+    interpreter.setBreakpointInstr([])
+    interpreter.execute('reverse')
+    assert len(history.cycleStarts) == 1
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+    if policy[0] == "full":
+        assert interpreter.getCycleCount() == 1
+
+
+def test_reverse_continue_write_breakpoints(reference):
+    interpreter = build(historyProgram)
+    stepTo(interpreter, 500)
+    # The last write of R4, by the inner loop
+    interpreter.setBreakpointRegister("user", 4, "w")
+    interpreter.execute('reverse')
+    r4Lines = (lineOf(historyProgram, "MOV R4, #6"), lineOf(historyProgram, "SUBS R4, R4, #1"))
+    assert state(interpreter) == reference[max(c for c in range(1, 500) if reference[c][3] in r4Lines)]
+
+    # The last write of the first word of the table, when R3 = 0
+    interpreter.setBreakpointRegister("user", 4, "")
+    interpreter.setBreakpointMem(interpreter.sim.regs[0], "w")
+    end = interpreter.getCycleCount()
+    interpreter.execute('reverse')
+    strLine = lineOf(historyProgram, "STR R1, [R0, R3, LSL #2]")
+    assert state(interpreter) == reference[max(c for c in range(1, end) if reference[c][3] == strLine
+                                               and reference[c][0]['User'][3] == 0)]
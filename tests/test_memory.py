@@ -0,0 +1,206 @@
+import random
+import pytest
+
+from testhelpers import build, lineOf, referenceStates, state
+from components import ComponentException
+
+
+# Three sections, separated by gaps, DATA ending on an odd address
+sectionsProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+MOV R0, #1
+B main
+
+SECTION DATA
+octets ASSIGN8 1, 2, 3, 4, 5, 6, 7
+"""
+
+# The DATA section is empty
+emptyProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+B main
+
+SECTION DATA
+"""
+
+
+def linearResolve(mem, addr, size):
+    # Reference implementation: look at every section
+    for sec in mem.startAddr:
+        if mem.startAddr[sec] <= addr < mem.endAddr[sec] - (size-1):
+            return sec, addr - mem.startAddr[sec]
+    return None
+
+
+@pytest.mark.parametrize("source", [sectionsProgram, emptyProgram], ids=["sections", "empty"])
+@pytest.mark.parametrize("size", [1, 2, 4])
+def test_resolve_address(source, size):
+    mem = build(source).sim.mem
+    # Every address around the beginning and the end of each section
+    limits = set(mem.startAddr.values()) | set(mem.endAddr.values())
+    addrs = {addr + delta for addr in limits for delta in range(-6, 7)} | {-1, 0, mem.maxAddr, mem.maxAddr + 1}
+    for addr in sorted(addrs):
+        assert mem._getRelativeAddr(addr, size) == linearResolve(mem, addr, size), (addr, size)
+
+
+def test_access_across_section_end():
+    mem = build(sectionsProgram).sim.mem
+    end = mem.endAddr['DATA']
+    assert bytes(mem.get(end - 4, 4)) == bytes((4, 5, 6, 7))
+    assert bytes(mem.get(end - 1, 1)) == bytes((7,))
+    # An access straddling the end of a section, or in the gap between two sections, is invalid
+    for addr, size in ((end - 3, 4), (end - 1, 2), (end, 1), (mem.endAddr['CODE'], 4), (mem.startAddr['DATA'] - 2, 4)):
+        with pytest.raises(ComponentException):
+            mem.get(addr, size)
+        with pytest.raises(ComponentException):
+            mem.set(addr, 0, size)
+
+
+# The DATA section spans several pages: initialized ones, and pages only holding the fill value
+memoryProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =milieu
+MOV R1, #0
+boucle
+STR R1, [R0, R1, LSL #2]
+ADD R1, R1, #1
+CMP R1, #70
+BLT boucle
+fin
+B fin
+
+SECTION DATA
+debut ASSIGN8 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16
+vide ALLOC32 200
+milieu ASSIGN32 0x11223344, 0x55667788, 0x99AABBCC
+vide2 ALLOC8 300
+dernier ASSIGN16 0x1234, 0x5678
+"""
+
+
+def buildMemory():
+    mem = build(memoryProgram).sim.mem
+    # Expected content of the memory, section by section
+    model = {sec: bytearray(data) for sec, data in mem.data.items()}
+    return mem, model
+
+def write(mem, model, offset, val, size):
+    # Write in the DATA section, and in the model
+    mem.set(mem.startAddr['DATA'] + offset, val, size)
+    model['DATA'][offset:offset+size] = val.to_bytes(size, "little")
+
+def randomWrites(mem, model, rng, count):
+    size = len(model['DATA'])
+    for i in range(count):
+        width = rng.choice((1, 2, 4))
+        if rng.random() < 0.5:
+            # Across or next to a page boundary
+            offset = rng.randrange(1, size >> mem.pageBits) << mem.pageBits
+            offset -= rng.randrange(width)
+        else:
+            offset = rng.randrange(size - width + 1)
+        write(mem, model, offset, rng.getrandbits(8 * width), width)
+
+
+def test_snapshot_copy_on_write():
+    mem, model = buildMemory()
+    rng = random.Random(42)
+    copy = lambda data: {key: bytes(val) for key, val in data.items()}
+    initial, image = copy(model), copy(mem.image)
+
+    first = mem.snapshot()
+    firstData, firstPages = copy(model), copy(first)
+    randomWrites(mem, model, rng, 50)
+    assert mem.data == model
+    second = mem.snapshot()
+    secondData, secondPages = copy(model), copy(second)
+    randomWrites(mem, model, rng, 50)
+    assert mem.data == model
+    # The writes did not modify the image, nor the pages of the snapshots
+    assert mem.image == image
+    assert first == firstPages and second == secondPages
+
+    # Changes since a snapshot, from the older and the last one
+    for snapshot, data in ((first, firstData), (second, secondData)):
+        expected = {('DATA', of): (old, new) for of, (old, new) in enumerate(zip(data['DATA'], model['DATA']))
+                    if old != new}
+        assert mem.diffSnapshot(snapshot) == expected
+
+    # Back to the last snapshot, then to the older one, then to the image
+    changes = mem.restoreSnapshot(second)
+    assert mem.data == secondData
+    assert changes == {('DATA', of): (old, new) for of, (old, new) in enumerate(zip(model['DATA'], secondData['DATA']))
+                       if old != new}
+    model = {sec: bytearray(data) for sec, data in secondData.items()}
+    # Writing after a restore does not modify the snapshot restored
+    randomWrites(mem, model, rng, 20)
+    assert mem.data == model
+    assert second == secondPages
+    mem.restoreSnapshot(first)
+    assert mem.data == firstData
+    mem.restoreSnapshot(mem.image)
+    assert mem.data == initial
+    # Back to the image, no page is copied anymore
+    assert not mem.pages
+    mem.restoreSnapshot(second)
+    assert mem.data == secondData
+    assert mem.image == image
+
+
+def test_reset_restore_state():
+    interpreter = build(memoryProgram)
+    initial = state(interpreter)
+    image = dict(interpreter.sim.mem.image)
+    interpreter.sim.maxit = 1000
+    interpreter.setBreakpointInstr([lineOf(memoryProgram, "B fin")])
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(memoryProgram, "B fin")
+    assert interpreter.sim.mem.pages
+    interpreter.getChangesFormatted(setCheckpoint=True)
+
+    interpreter.reset(restoreState=True)
+    assert state(interpreter) == initial
+    # The pages written were dropped, the image was not modified
+    assert not interpreter.sim.mem.pages
+    assert interpreter.sim.mem.image == image
+    # The values restored are reported as changes
+    names = {change[0] for change in interpreter.getChangesFormatted(setCheckpoint=True)}
+    assert {"r0", "r1"} <= names
+    assert any(name.startswith("mem") for name in names)
+    # The execution is the same as the first one
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(memoryProgram, "B fin")
+    reset = build(memoryProgram)
+    reset.sim.maxit = 1000
+    reset.setBreakpointInstr([lineOf(memoryProgram, "B fin")])
+    reset.execute('run')
+    assert state(interpreter)[0] == state(reset)[0] and state(interpreter)[4] == state(reset)[4]
+
+
+def test_step_back_across_memory_breakpoint():
+    # The pages copied on write are restored by the steps back
+    interpreter = build(memoryProgram)
+    interpreter.sim.maxit = 1000
+    milieu = interpreter.sim.mem.startAddr['DATA'] + 16 + 4 * 200
+    # A word of the third page of the section
+    interpreter.setBreakpointMem(milieu + 4 * 60, "w")
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(memoryProgram, "STR R1, [R0, R1, LSL #2]")
+    assert interpreter.getRegisters()['User'][1] == 60
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(memoryProgram, "B fin")
+
+    reference = referenceStates(memoryProgram, interpreter.getCycleCount())
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+    while interpreter.getCycleCount() > 1:
+        interpreter.stepBack(1)
+        assert state(interpreter) == reference[interpreter.getCycleCount()]
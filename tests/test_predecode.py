@@ -0,0 +1,102 @@
+import struct
+import pytest
+
+from testhelpers import build, lineOf, state, stepTo
+import settings
+
+
+# The STR rewrites an instruction of the CODE section before it is executed
+rewriteProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+LDR R0, =cible
+LDR R1, =nouvelle
+LDR R2, [R1]
+MOV R3, #0
+STR R2, [R0]
+cible
+ADD R3, R3, #1
+ADD R3, R3, #2
+fin
+B fin
+
+nouvelle
+ADD R3, R3, #100
+
+SECTION DATA
+"""
+
+# A word of the CODE section which is not a valid instruction
+invalidProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+MOV R0, #0
+invalide ASSIGN32 0xE7F000F0
+MOV R1, #1
+
+SECTION DATA
+"""
+
+
+def wordAt(interpreter, addr):
+    return struct.unpack("<I", interpreter.sim.mem.get(addr, mayTriggerBkpt=False))[0]
+
+
+def test_executable_sections_predecoded():
+    interpreter = build(rewriteProgram)
+    sim = interpreter.sim
+    for sec in ("INTVEC", "CODE"):
+        for addr in range(sim.mem.startAddr[sec], sim.mem.endAddr[sec] - 3, 4):
+            instr = sim.predecoded.get(addr)
+            assert instr is not None and instr.instrInt == wordAt(interpreter, addr)
+            # The image holds the objects of the decoder cache
+            assert instr is sim.decoderCache[instr.instrInt]
+    # Misaligned addresses and data are not in the image
+    assert sim.predecoded.get(sim.mem.startAddr["CODE"] + 2) is None
+    assert sim.predecoded.get(sim.mem.startAddr["DATA"]) is None
+
+
+def test_write_to_code_redecodes():
+    interpreter = build(rewriteProgram)
+    sim = interpreter.sim
+    cible = interpreter.line2addr[lineOf(rewriteProgram, "cible") + 1]
+    suivante = cible + 4
+    nouvelle = wordAt(interpreter, interpreter.line2addr[lineOf(rewriteProgram, "nouvelle") + 1])
+    original = sim.predecoded.get(cible)
+    untouched = sim.predecoded.get(suivante)
+
+    strLine = lineOf(rewriteProgram, "STR R2, [R0]")
+    while interpreter.getCurrentLine() != strLine:
+        interpreter.execute('into')
+    interpreter.execute('into')
+    assert sim.predecoded.get(cible).instrInt == nouvelle
+    assert sim.predecoded.get(suivante) is untouched
+    stepTo(interpreter, interpreter.getCycleCount() + 2)
+    assert interpreter.getRegisters()['User'][3] == 102
+
+    # Stepping back over the write restores the original instruction
+    interpreter.stepBack(3)
+    assert sim.predecoded.get(cible) is original
+
+
+@pytest.mark.parametrize("mode", ["into", "run"])
+def test_invalid_word_falls_back(mode, monkeypatch):
+    interpreter = build(invalidProgram)
+    addr = interpreter.line2addr[lineOf(invalidProgram, "invalide ASSIGN32 0xE7F000F0")]
+    assert interpreter.sim.predecoded.get(addr) is None
+    monkeypatch.setitem(settings._settings, "predecode", False)
+    reference = build(invalidProgram)
+    assert reference.sim.predecoded is None
+
+    for interp in (interpreter, reference):
+        interp.sim.maxit = 100
+        while not interp.getErrors():
+            interp.execute(mode)
+    # The regular decoding reports the invalid instruction, at the same cycle
+    assert interpreter.getErrors().content == reference.getErrors().content
+    assert interpreter.getErrors().content[0][1] == "Le bytecode à cette adresse ne correspond à aucune instruction valide"
+    assert state(interpreter) == state(reference)
@@ -0,0 +1,110 @@
+import random
+import pytest
+
+from testhelpers import build, lineOf, referenceStates, state
+
+
+# Writes registers in User, FIQ and IRQ modes
+bankingProgram = """SECTION INTVEC
+B main
+
+SECTION CODE
+main
+MOV R8, #1
+MOV R13, #2
+MRS R0, CPSR
+BIC R0, R0, #0x1F
+ORR R1, R0, #0x11
+MSR CPSR, R1
+MOV R8, #3
+MOV R13, #4
+MOV R2, #0x10
+MSR SPSR, R2
+ORR R1, R0, #0x12
+MSR CPSR, R1
+MOV R13, #6
+MOV R8, #7
+MOV R3, #8
+fin
+B fin
+
+SECTION DATA
+"""
+
+banks = ('User', 'FIQ', 'IRQ', 'SVC')
+
+
+def sharedWith(bank, reg):
+    # Banks using the same register as register `reg` of `bank`
+    if reg < 8 or reg == 15:
+        return set(banks)
+    if reg < 13:
+        return {'FIQ'} if bank == 'FIQ' else set(banks) - {'FIQ'}
+    return {bank}
+
+
+def test_register_aliasing():
+    regs = build(bankingProgram).sim.regs
+    rng = random.Random(7)
+    model = regs.getAllRegisters()
+    for i in range(500):
+        bank, reg, val = rng.choice(banks), rng.randrange(16), rng.getrandbits(32)
+        regs.setRegister(bank, reg, val)
+        for other in sharedWith(bank, reg):
+            model[other][reg] = val
+        assert regs.getAllRegisters() == model
+        assert regs.getRegister(bank, reg) == val
+    # The current mode selects the bank used by the indexing
+    for bank in banks:
+        regs.mode = bank
+        assert [regs[reg] for reg in range(16)] == [model[bank][reg] for reg in range(16)]
+
+
+def test_banked_registers_program():
+    interpreter = build(bankingProgram)
+    interpreter.sim.maxit = 100
+    interpreter.setBreakpointInstr([lineOf(bankingProgram, "B fin")])
+    interpreter.execute('run')
+    registers = interpreter.getRegisters()
+    assert (registers['User'][8], registers['User'][13]) == (7, 2)
+    assert (registers['FIQ'][8], registers['FIQ'][13]) == (3, 4)
+    assert (registers['IRQ'][8], registers['IRQ'][13]) == (7, 6)
+    assert registers['SVC'][8] == 7 and registers['SVC'][13] == 0
+    assert interpreter.sim.regs.getContext()['FIQ'][16] == 0x10
+    assert interpreter.getProcessorMode() == 'IRQ'
+
+
+@pytest.mark.parametrize("text,expected,unexpected", [
+    ("MOV R13, #4", {"FIQ_r13"}, {"r13", "IRQ_r13", "SVC_r13"}),
+    ("MOV R8, #7", {"r8", "IRQ_r8", "SVC_r8"}, {"FIQ_r8"}),
+    ("MOV R3, #8", {"r3", "FIQ_r3", "IRQ_r3", "SVC_r3"}, set()),
+])
+def test_changes_reported_for_each_bank(text, expected, unexpected):
+    interpreter = build(bankingProgram)
+    line = lineOf(bankingProgram, text)
+    while interpreter.getCurrentLine() != line:
+        interpreter.execute('into')
+    interpreter.getChangesFormatted(setCheckpoint=True)
+    interpreter.execute('into')
+    names = {change[0] for change in interpreter.getChangesFormatted(setCheckpoint=True)}
+    assert expected <= names
+    assert not unexpected & names
+
+
+def test_step_back_across_banked_breakpoint():
+    interpreter = build(bankingProgram)
+    interpreter.sim.maxit = 100
+    finLine = lineOf(bankingProgram, "B fin")
+    interpreter.setBreakpointInstr([finLine])
+    # Only the R8 of the FIQ bank
+    interpreter.setBreakpointRegister("FIQ", 8, "w")
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == lineOf(bankingProgram, "MOV R8, #3")
+    interpreter.execute('run')
+    assert interpreter.getCurrentLine() == finLine
+
+    reference = referenceStates(bankingProgram, interpreter.getCycleCount())
+    assert state(interpreter) == reference[interpreter.getCycleCount()]
+    while interpreter.getCycleCount() > 1:
+        interpreter.stepBack(1)
+        assert state(interpreter) == reference[interpreter.getCycleCount()]
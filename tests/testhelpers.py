@@ -0,0 +1,54 @@
+"""
+Helpers shared by the simulator tests: assemble a program given as a string, and
+compare the state of a simulation with the one of a reference execution.
+"""
+import sys
+
+sys.path.append("..")
+from assembler import parse as ASMparser
+from bytecodeinterpreter import BCInterpreter
+
+
+def build(source, interrupt=None):
+    """
+    Assemble `source` and return an interpreter ready to execute it.
+    If `interrupt` is not None, it gives the (ncyclesbefore, ncyclesperiod, begincountat)
+    parameters of an IRQ (see BCInterpreter.setInterrupt).
+    """
+    bytecode, bcinfos, _, assertInfos, _, errors = ASMparser(source.split("\n"))
+    assert not errors, errors
+    interpreter = BCInterpreter(bytecode, bcinfos, assertInfos)
+    if interrupt is not None:
+        interpreter.setInterrupt("IRQ", False, *interrupt)
+    return interpreter
+
+def lineOf(source, text):
+    # Number of the first line of `source` holding exactly `text`
+    return source.split("\n").index(text)
+
+def state(interpreter):
+    """
+    Return the state of the simulation seen by the user: registers, flags, cycle count,
+    current line and memory content.
+    """
+    memory = {sec: bytes(data) for sec, data in interpreter.sim.mem.data.items()}
+    return (interpreter.getRegisters(), interpreter.getFlags(), interpreter.getCycleCount(),
+            interpreter.getCurrentLine(), memory)
+
+def stepTo(interpreter, cycle):
+    # Execute one instruction at a time (the reference execution) up to `cycle`
+    while interpreter.getCycleCount() < cycle:
+        interpreter.execute('into')
+    return interpreter
+
+def referenceStates(source, ncycles, interrupt=None):
+    """
+    Execute `source` one instruction at a time, and return its state at each cycle
+    up to `ncycles`, as a dictionary {cycle: state}.
+    """
+    interpreter = build(source, interrupt)
+    states = {interpreter.getCycleCount(): state(interpreter)}
+    while interpreter.getCycleCount() < ncycles:
+        interpreter.execute('into')
+        states[interpreter.getCycleCount()] = state(interpreter)
+    return states